@@ -0,0 +1,257 @@
+"""
+Parallel parameter sweep over planet weight sets.
+
+The price matrix (stocks x days closes on a shared calendar), each stock's
+natal wealth mask and the transit star/sub lords per day are copied into
+shared memory once. Worker processes attach to those blocks in their
+initializer and are sent only chunks of weight vectors, so no price data
+is pickled per task.
+
+Which of a transiting planet's star and sub lord fall in a stock's natal
+mask does not depend on the weights, so the daily score of every weight
+set in a chunk (the score of analysis.transit_scores) comes from one
+matrix product per block of stocks.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from analysis.correlation import daily_returns
+from analysis.transit_scores import SCORE_DECIMALS
+from kp_astrology.encoding import BIT_VALUES, weight_vector
+from kp_astrology.sub_lords import PLANETS
+
+# Upper bound on (stocks x days x weight sets) scores held at once
+BLOCK_ELEMENTS = 1 << 22
+# score > _UP_THRESHOLD is the same test as round(score, SCORE_DECIMALS) > 0
+_UP_THRESHOLD = 0.5 * 10.0 ** -SCORE_DECIMALS
+
+_worker_arrays = None
+_worker_blocks = None
+
+
+class SharedArrays:
+    """Named NumPy arrays copied into shared memory blocks"""
+
+    def __init__(self, arrays):
+        self.blocks = []
+        self.specs = {}
+        for name, array in arrays.items():
+            array = np.ascontiguousarray(array)
+            block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            np.ndarray(array.shape, array.dtype, buffer=block.buf)[...] = array
+            self.blocks.append(block)
+            self.specs[name] = (block.name, array.shape, array.dtype.str)
+
+    def close(self):
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+        self.blocks = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def attach_shared_arrays(specs):
+    """(arrays, blocks) views of SharedArrays.specs; keep blocks alive while in use"""
+    arrays, blocks = {}, []
+    for name, (block_name, shape, dtype) in specs.items():
+        block = shared_memory.SharedMemory(name=block_name)
+        blocks.append(block)
+        arrays[name] = np.ndarray(shape, dtype, buffer=block.buf)
+    return arrays, blocks
+
+
+def series_price_matrix(series, stock_ids):
+    """
+    (dates, closes, present) from (stock_id, dates, closes) arrays per stock.
+
+    closes is (stocks x dates) on the union calendar, forward-filled inside
+    each stock's history so a return always spans the stock's previous bar;
+    present marks the dates a stock actually has a bar.
+    """
+    series = list(series)
+    row_stocks = np.repeat([stock_id for stock_id, _, _ in series],
+                           [len(dates) for _, dates, _ in series]).astype(np.int64)
+    row_dates = np.concatenate([np.asarray(dates, dtype='datetime64[D]') for _, dates, _ in series]
+                               or [np.zeros(0, dtype='datetime64[D]')])
+    row_closes = np.concatenate([np.asarray(closes, dtype=np.float64) for _, _, closes in series]
+                                or [np.zeros(0)])
+    return _price_matrix(stock_ids, row_stocks, row_dates, row_closes)
+
+
+def _price_matrix(stock_ids, row_stocks, row_dates, row_closes):
+    stock_ids = np.asarray(stock_ids, dtype=np.int64)
+    dates = np.unique(row_dates)
+    order = np.argsort(stock_ids)
+    stock_index = order[np.searchsorted(stock_ids, row_stocks, sorter=order)]
+    date_index = np.searchsorted(dates, row_dates)
+
+    closes = np.full((len(stock_ids), len(dates)), np.nan)
+    present = np.zeros(closes.shape, dtype=bool)
+    closes[stock_index, date_index] = row_closes
+    present[stock_index, date_index] = True
+
+    # Forward fill: index of the latest bar at or before each date
+    latest = np.where(present, np.arange(len(dates)), 0)
+    np.maximum.accumulate(latest, axis=1, out=latest)
+    closes = np.take_along_axis(closes, latest, axis=1)
+    started = np.maximum.accumulate(present, axis=1)
+    closes[~started] = np.nan
+    return dates, closes, present
+
+
+def actual_directions(closes, present):
+    """(stocks x days-1) int8: +1 up, -1 not up, 0 where there is no return"""
+    returns = daily_returns(closes)
+    actual = np.where(returns > 0, 1, -1).astype(np.int8)
+    actual[np.isnan(returns) | ~present[:, 1:]] = 0
+    return actual
+
+
+def weight_matrix(weight_sets):
+    """(sets x PLANETS) float array from {planet: weight} dicts or sequences"""
+    return np.array([
+        weight_vector(weights)[:len(PLANETS)] if isinstance(weights, dict) else weights
+        for weights in weight_sets
+    ], dtype=np.float64).reshape(-1, len(PLANETS))
+
+
+def random_weight_sets(count, seed=None, low=-1.0, high=1.0):
+    rng = np.random.default_rng(seed)
+    return np.round(rng.uniform(low, high, size=(count, len(PLANETS))), 2)
+
+
+def evaluate_weights(arrays, weights):
+    """
+    Counts per (weight set x stock): hits, UP calls and correct UP calls.
+
+    arrays holds 'actual' (stocks x days), 'masks' (stocks) and
+    'star_lords'/'sub_lords' (days x PLANETS) for the return dates.
+    """
+    actual = arrays['actual']
+    masks = arrays['masks']
+    star_bits = BIT_VALUES[arrays['star_lords']]
+    sub_bits = BIT_VALUES[arrays['sub_lords']]
+    weights = np.asarray(weights, dtype=np.float64)
+
+    stocks, days = actual.shape
+    sets = len(weights)
+    hits = np.zeros((sets, stocks), dtype=np.int64)
+    up_calls = np.zeros((sets, stocks), dtype=np.int64)
+    up_hits = np.zeros((sets, stocks), dtype=np.int64)
+
+    block = max(1, BLOCK_ELEMENTS // max(days * sets, 1))
+    for first in range(0, stocks, block):
+        chunk = slice(first, first + block)
+        mask = masks[chunk, None, None]
+        activation = ((star_bits & mask) != 0).astype(np.float64) + ((sub_bits & mask) != 0)
+        # Unscaled scores: star and sub lord hits count 1 here instead of 0.5
+        up = (activation @ weights.T) > 2 * _UP_THRESHOLD  # (block x days x sets)
+
+        moves = actual[chunk, :, None]
+        went_up = moves == 1
+        valid = moves != 0
+        hits[:, chunk] = (np.where(up, went_up, moves == -1)).sum(axis=1).T
+        up_calls[:, chunk] = (up & valid).sum(axis=1).T
+        up_hits[:, chunk] = (up & went_up).sum(axis=1).T
+    return hits, up_calls, up_hits
+
+
+def _init_worker(specs):
+    """ProcessPoolExecutor initializer: attach the shared backtest arrays"""
+    global _worker_arrays, _worker_blocks
+    _worker_arrays, _worker_blocks = attach_shared_arrays(specs)
+
+
+def _evaluate_worker(weights):
+    return evaluate_weights(_worker_arrays, weights)
+
+
+class Backtester:
+    def __init__(self, closes, present, masks, star_lords, sub_lords):
+        """closes/present from series_price_matrix(); lords for the dates after the first"""
+        self.arrays = {
+            'actual': actual_directions(closes, present),
+            'masks': np.asarray(masks, dtype=BIT_VALUES.dtype),
+            'star_lords': np.asarray(star_lords, dtype=np.int8),
+            'sub_lords': np.asarray(sub_lords, dtype=np.int8),
+        }
+
+    def run(self, weight_sets, processes=None, chunk_size=32, progress=None):
+        """
+        Evaluate every weight set; results in input order, in this process
+        unless processes > 1. progress, if given, is called with the
+        finished fraction after each chunk.
+        """
+        weights = weight_matrix(weight_sets)
+        chunks = [weights[i:i + chunk_size] for i in range(0, len(weights), chunk_size)]
+        processes = min(processes or 1, len(chunks))
+
+        counts = []
+        if processes <= 1:
+            for chunk in chunks:
+                counts.append(evaluate_weights(self.arrays, chunk))
+                if progress:
+                    progress(len(counts) / len(chunks))
+        else:
+            with SharedArrays(self.arrays) as shared:
+                with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker,
+                                         initargs=(shared.specs,)) as executor:
+                    for part in executor.map(_evaluate_worker, chunks):
+                        counts.append(part)
+                        if progress:
+                            progress(len(counts) / len(chunks))
+
+        if counts:
+            hits, up_calls, up_hits = (np.concatenate(parts) for parts in zip(*counts))
+        else:
+            hits = up_calls = up_hits = np.zeros((0, len(self.arrays['masks'])), dtype=np.int64)
+        return self.summarize(weights, hits, up_calls, up_hits)
+
+    def summarize(self, weights, hits, up_calls, up_hits):
+        """Accuracy and hit-rate distributions per weight set"""
+        days = (self.arrays['actual'] != 0).sum(axis=1)
+        active = days > 0
+        total_days = int(days.sum())
+        calls = days[None, :]
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            stock_accuracy = hits[:, active] / calls[:, active] * 100
+            up_hit_rate = up_hits.sum(axis=1) / up_calls.sum(axis=1) * 100
+            down_calls = total_days - up_calls.sum(axis=1)
+            down_hit_rate = (hits.sum(axis=1) - up_hits.sum(axis=1)) / down_calls * 100
+
+        if stock_accuracy.shape[1]:
+            percentiles = np.percentile(stock_accuracy, [10, 50, 90], axis=1)
+            means = stock_accuracy.mean(axis=1)
+            stds = stock_accuracy.std(axis=1)
+        else:
+            percentiles = np.zeros((3, len(weights)))
+            means = stds = np.zeros(len(weights))
+
+        results = []
+        for index, row in enumerate(weights.tolist()):
+            results.append({
+                'weights': {planet: weight for planet, weight in zip(PLANETS, row)},
+                'accuracy': round(float(hits[index].sum()) / total_days * 100, 2) if total_days else 0.0,
+                'up_hit_rate': _rounded(up_hit_rate[index]),
+                'down_hit_rate': _rounded(down_hit_rate[index]),
+                'stock_accuracy': {
+                    'mean': _rounded(means[index]),
+                    'std': _rounded(stds[index]),
+                    'p10': _rounded(percentiles[0, index]),
+                    'p50': _rounded(percentiles[1, index]),
+                    'p90': _rounded(percentiles[2, index]),
+                },
+            })
+        return results
+
+
+def _rounded(value):
+    return None if np.isnan(value) else round(float(value), 2)
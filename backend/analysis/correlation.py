@@ -0,0 +1,108 @@
+"""
+Vectorized price/score correlation.
+
+Closes are contiguous float64 arrays. Every function works along the last
+axis, so a (symbols x days) matrix padded with NaN for missing bars is
+handled in one pass just like a single series.
+"""
+import numpy as np
+
+
+def daily_returns(closes):
+    """
+    Percent change from the previous close along the last axis.
+
+    A day whose previous close is zero or negative has change 0; a day where
+    either close is missing (NaN) is NaN and is excluded from the counts.
+    """
+    closes = np.asarray(closes, dtype=np.float64)
+    previous = closes[..., :-1]
+    current = closes[..., 1:]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        returns = np.where(previous > 0, (current - previous) / previous * 100, 0.0)
+    missing = np.isnan(previous) | np.isnan(current)
+    returns[missing] = np.nan
+    return returns
+
+
+def direction_hits(returns, scores):
+    """
+    Predicted/actual directions (+1/-1) and hits.
+
+    scores broadcasts against returns: a scalar, a per-day series or a
+    (symbols x days) matrix. Positive score predicts UP, positive return is UP.
+    """
+    returns = np.asarray(returns, dtype=np.float64)
+    predicted = np.where(np.asarray(scores) > 0, 1, -1).astype(np.int8)
+    actual = np.where(returns > 0, 1, -1).astype(np.int8)
+    predicted = np.broadcast_to(predicted, actual.shape)
+    valid = ~np.isnan(returns)
+    hits = (predicted == actual) & valid
+    return predicted, actual, hits, valid
+
+
+def direction_counts(predicted, actual, hits, valid):
+    """
+    (correct, days, up_days, up_calls) along the last axis: the counts the
+    significance tests need, all additive over time
+    """
+    return (hits.sum(axis=-1), valid.sum(axis=-1),
+            ((actual == 1) & valid).sum(axis=-1), ((predicted == 1) & valid).sum(axis=-1))
+
+
+def rolling_accuracy(hits, valid, window, step=1):
+    """
+    Accuracy over windows of `window` consecutive entries, one window ending
+    every `step` entries (the last window ends at the last entry).
+
+    Window counts are differences of cumulative sums, so every window costs
+    O(1) after a single O(n) pass. Returns (end indices, accuracy %,
+    correct, total) along the last axis; end indices are inclusive.
+    """
+    hits = np.asarray(hits)
+    count = hits.shape[-1]
+    if window > count or window < 1:
+        empty = np.zeros(hits.shape[:-1] + (0,))
+        return np.zeros(0, dtype=np.int64), empty, empty.astype(np.int64), empty.astype(np.int64)
+
+    padding = [(0, 0)] * (hits.ndim - 1) + [(1, 0)]
+    hit_sums = np.pad(np.cumsum(hits, axis=-1, dtype=np.int64), padding)
+    valid_sums = np.pad(np.cumsum(valid, axis=-1, dtype=np.int64), padding)
+
+    ends = np.arange(count, window - 1, -step)[::-1]
+    correct = hit_sums[..., ends] - hit_sums[..., ends - window]
+    total = valid_sums[..., ends] - valid_sums[..., ends - window]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        percent = np.where(total > 0, correct / total * 100, 0.0)
+    return ends - 1, np.round(percent, 2), correct, total
+
+
+def window_slice(dates, window=10, start=None, end=None):
+    """
+    Slice of a date array to report: start/end (inclusive dates) if given,
+    otherwise the last `window` entries
+    """
+    if start is None and end is None:
+        return slice(max(len(dates) - window, 0), len(dates))
+    first = 0 if start is None else int(np.searchsorted(dates, np.datetime64(start, 'D'), side='left'))
+    last = len(dates) if end is None else int(np.searchsorted(dates, np.datetime64(end, 'D'), side='right'))
+    return slice(first, last)
+
+
+def daily_rows(dates, returns, scores, predicted, actual, hits, rows):
+    """JSON rows for one series, only for the `rows` slice"""
+    scores = np.broadcast_to(np.asarray(scores, dtype=np.float64), returns.shape)
+    result = []
+    for day, change, score, p, a, hit in zip(
+            dates[rows].tolist(), np.round(returns[rows], 2).tolist(),
+            np.round(scores[rows], 2).tolist(), predicted[rows].tolist(),
+            actual[rows].tolist(), hits[rows].tolist()):
+        result.append({
+            'date': day.isoformat(),
+            'price_change': None if change != change else change,
+            'astro_score': None if score != score else score,
+            'predicted_direction': 'UP' if p == 1 else 'DOWN',
+            'actual_direction': 'UP' if a == 1 else 'DOWN',
+            'prediction_correct': hit
+        })
+    return result
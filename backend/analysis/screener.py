@@ -0,0 +1,44 @@
+"""
+Cross-sectional screening of every stock for one date.
+
+SignificatorStore keeps the natal significator masks of all stocks as one
+(stocks x 12) uint16 array in memory, so a screen is a handful of array
+operations instead of a chart row and JSON decode per stock. Its version
+is read from the database (see app.significator_version), so every worker
+reloads after a chart is added or rebuilt anywhere. Reloads replace the
+arrays rather than mutating them, so a snapshot taken by a running screen
+stays consistent.
+"""
+import threading
+
+import numpy as np
+
+from kp_astrology.encoding import MASK_DTYPE
+
+
+class SignificatorStore:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.version = None
+        self._stock_ids = np.zeros(0, dtype=np.int64)
+        self._symbols = []
+        self._masks = np.zeros((0, 12), dtype=MASK_DTYPE)
+
+    def load(self, rows, version):
+        """Replace the contents with (stock_id, symbol, masks) rows read at `version`"""
+        rows = sorted(rows, key=lambda row: row[0])
+        stock_ids = np.array([row[0] for row in rows], dtype=np.int64)
+        symbols = [row[1] for row in rows]
+        masks = (np.array([row[2] for row in rows], dtype=MASK_DTYPE) if rows
+                 else np.zeros((0, 12), dtype=MASK_DTYPE))
+        with self._lock:
+            self._stock_ids, self._symbols, self._masks = stock_ids, symbols, masks
+            self.version = version
+
+    def snapshot(self):
+        """(version, stock_ids, symbols, masks) as of now"""
+        with self._lock:
+            return self.version, self._stock_ids, self._symbols, self._masks
+
+    def __len__(self):
+        return len(self._stock_ids)
@@ -0,0 +1,87 @@
+"""
+Significance of direction-prediction accuracy.
+
+Both tests depend on the direction series only through four counts per
+stock: valid days n, correct calls, actual UP days u and predicted UP days
+k. Shuffling the predictions against the moves leaves the number of UP
+calls landing on UP days hypergeometric(u, n - u, k), and resampling days
+with replacement makes the number of hits binomial(n, accuracy). Drawing
+from those distributions is exactly a permutation test and a bootstrap,
+but costs O(resamples) per stock instead of O(resamples x days), and it
+works from the incrementally maintained counts in CorrelationSummary.
+
+Stocks are processed in fixed chunks, each with its own child seed of the
+caller's seed, so results are reproducible and do not depend on how many
+processes the chunks are spread over.
+"""
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+# Stocks per seeded chunk (and per task when fanned out over processes)
+CHUNK_SIZE = 256
+# Upper bound on (stocks x resamples) draws held at once
+BATCH_ELEMENTS = 1 << 22
+
+
+def _chunk_significance(args):
+    correct, days, up_days, up_calls, resamples, seed, confidence = args
+    rng = np.random.default_rng(seed)
+    stocks = len(days)
+    p_values = np.ones(stocks)
+    low = np.full(stocks, np.nan)
+    high = np.full(stocks, np.nan)
+
+    batch = max(1, BATCH_ELEMENTS // resamples)
+    tail = (1 - confidence) / 2
+    for first in range(0, stocks, batch):
+        rows = slice(first, first + batch)
+        n, u, k = days[rows, None], up_days[rows, None], up_calls[rows, None]
+        observed = correct[rows, None]
+
+        # Permutation: UP calls on UP days, the rest of the hits are DOWN on DOWN
+        up_on_up = rng.hypergeometric(u, n - u, k, size=(len(n), resamples))
+        permuted = 2 * up_on_up + n - k - u
+        p_values[rows] = ((permuted >= observed).sum(axis=1) + 1) / (resamples + 1)
+
+        # Bootstrap of the accuracy over resampled days
+        with np.errstate(divide='ignore', invalid='ignore'):
+            accuracy = np.where(n > 0, observed / n, 0.0)
+            resampled = rng.binomial(n, accuracy, size=(len(n), resamples)) / n * 100
+        valid = n[:, 0] > 0
+        if valid.any():
+            bounds = np.percentile(resampled[valid], [tail * 100, (1 - tail) * 100], axis=1)
+            low[rows][valid] = bounds[0]
+            high[rows][valid] = bounds[1]
+    return p_values, low, high
+
+
+def significance(correct, days, up_days, up_calls, resamples=10000, seed=0,
+                 confidence=0.95, processes=None):
+    """
+    One-sided permutation p-values (accuracy this high by chance) and
+    bootstrap confidence intervals (in %) for arrays of per-stock counts.
+    Returns a dict of arrays: p_value, ci_low, ci_high.
+    """
+    counts = [np.atleast_1d(np.asarray(values, dtype=np.int64))
+              for values in (correct, days, up_days, up_calls)]
+    stocks = len(counts[1])
+    starts = range(0, stocks, CHUNK_SIZE)
+    seeds = np.random.SeedSequence(seed).spawn(len(starts))
+    tasks = [
+        tuple(values[first:first + CHUNK_SIZE] for values in counts)
+        + (resamples, chunk_seed, confidence)
+        for first, chunk_seed in zip(starts, seeds)
+    ]
+
+    if processes and processes > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=min(processes, len(tasks))) as executor:
+            parts = list(executor.map(_chunk_significance, tasks))
+    else:
+        parts = [_chunk_significance(task) for task in tasks]
+
+    if not parts:
+        empty = np.zeros(0)
+        return {'p_value': empty, 'ci_low': empty, 'ci_high': empty}
+    p_values, low, high = (np.concatenate(values) for values in zip(*parts))
+    return {'p_value': p_values, 'ci_low': np.round(low, 2), 'ci_high': np.round(high, 2)}
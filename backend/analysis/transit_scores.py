@@ -0,0 +1,47 @@
+"""
+Per-day astro score series from transits.
+
+All nine KP planets are placed for every date in one batch ephemeris pass
+at market open. A transiting planet activates the natal wealth houses when
+its star lord or sub lord is a natal 2nd/11th house significator. The
+day's score is the sum of the weights of the activating planets, and the
+star lord and sub lord count half each.
+"""
+import numpy as np
+
+from kp_astrology.chart_calculator import UNIX_EPOCH_JD
+from kp_astrology.encoding import BIT_VALUES, weight_vector
+from kp_astrology.sub_lords import PLANETS, kp_lords_array
+
+# Bump when the scoring rule changes so persisted results are recomputed
+SCORING_VERSION = 2
+
+# Scores are rounded so sums that are exactly zero (0.8 - 0.5 - 0.3) do not
+# pick up a sign from floating-point summation order
+SCORE_DECIMALS = 9
+
+# 10:00 IST
+MARKET_OPEN_UTC_HOURS = 4.5
+
+
+def julian_days_from_dates(dates, utc_hours=MARKET_OPEN_UTC_HOURS):
+    """Julian days for datetime64[D] dates at a fixed UTC time of day"""
+    days = np.asarray(dates, dtype='datetime64[D]').astype(np.int64)
+    return days + UNIX_EPOCH_JD + utc_hours / 24.0
+
+
+def transit_lords(calculator, dates):
+    """(star lord, sub lord) code arrays, (days x PLANETS), for each date"""
+    positions = calculator.calculate_planet_positions_batch(
+        julian_days_from_dates(dates), PLANETS
+    )
+    lords = kp_lords_array(positions['longitude'])
+    return lords['star_lord'], lords['sub_lord']
+
+
+def transit_score_series(star_lords, sub_lords, wealth_mask, weights):
+    """Score per day for the natal mask; weights is a {planet: weight} dict"""
+    star_hits = (BIT_VALUES[star_lords] & wealth_mask) != 0
+    sub_hits = (BIT_VALUES[sub_lords] & wealth_mask) != 0
+    activation = (star_hits.astype(np.float64) + sub_hits) * 0.5
+    return np.round(activation @ weight_vector(weights)[:len(PLANETS)], SCORE_DECIMALS)
@@ -1,257 +1,313 @@
 from flask import Flask, jsonify, request, render_template_string
-from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import func
 from datetime import datetime, timedelta
+import csv
+import hashlib
+import io
+import json
 import random
 import math
 import os
 
-app = Flask(__name__)
+import numpy as np
 
-# Database configuration - SQLite only for now
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///stocks.db'
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+from analysis import backtest, correlation, significance, transit_scores
+from analysis.screener import SignificatorStore
+from data.price_store import PriceStore, price_columns
+from database import init_db
+from job_queue import JobQueue, QueueFull
+from kp_astrology.cache import LRUCache
+from kp_astrology.chart_calculator import KPChartCalculator, julian_days_from_datetimes
+from kp_astrology.encoding import decode_mask, encode_planets, pack_masks, score_table, unpack_masks
+from kp_astrology.ephemeris_table import open_default_table
+from kp_astrology.houses import equal_house_cusps
+from kp_astrology.ruling_planets import RulingPlanetsService
+from kp_astrology.significator import BODIES, KPSignificator
+from kp_astrology.sub_lords import sub_lord as kp_sub_lord
+from kp_astrology.transit_events import TransitEventEngine, load_default_index
+from migrate_db import ensure_schema
+from models.stock_models import db, CorrelationSummary, Job, KPBirthChart, Stock, StockPrice
 
-db = SQLAlchemy(app)
+app = Flask(__name__)
 
-# Stock Model
-class Stock(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    symbol = db.Column(db.String(20), unique=True, nullable=False)
-    name = db.Column(db.String(100))
-    listing_date = db.Column(db.String(50), nullable=False)
-    listing_time = db.Column(db.String(50), default='10:00')
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+# Database configuration: DATABASE_URL, pool and SQLite settings (see database.py)
+init_db(app)
 
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'symbol': self.symbol,
-            'name': self.name,
-            'listing_date': self.listing_date,
-            'listing_time': self.listing_time,
-            'created_at': self.created_at.isoformat() if self.created_at else None
-        }
+# Create missing tables and columns; index upgrades run from migrate_db.py
+with app.app_context():
+    ensure_schema()
+    print("✅ Database tables created successfully!")
 
-# Stock Price Model
-class StockPrice(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    stock_id = db.Column(db.Integer, db.ForeignKey('stock.id'), nullable=False)
-    date = db.Column(db.Date, nullable=False)
-    open_price = db.Column(db.Float)
-    high_price = db.Column(db.Float)
-    low_price = db.Column(db.Float)
-    close_price = db.Column(db.Float)
-    volume = db.Column(db.BigInteger)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-
-    def to_dict(self):
-        return {
-            'date': self.date.isoformat(),
-            'open': self.open_price,
-            'high': self.high_price,
-            'low': self.low_price,
-            'close': self.close_price,
-            'volume': self.volume
-        }
+# Shared cache of computed charts (many stocks share a listing instant)
+chart_cache = LRUCache(maxsize=4096)
 
-# KP Birth Chart Model
-class KPBirthChart(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    stock_id = db.Column(db.Integer, db.ForeignKey('stock.id'), nullable=False)
-    ascendant_degree = db.Column(db.Float)
-    planet_positions = db.Column(db.JSON)  # Store as JSON
-    house_significators = db.Column(db.JSON)  # Store as JSON
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+# Resamples for the permutation test and bootstrap interval of an accuracy
+SIGNIFICANCE_RESAMPLES = 10000
 
-# Create tables
-with app.app_context():
-    db.create_all()
-    print("✅ Database tables created successfully!")
+# Score > 1.0 is STRONGLY_BULLISH, > 0.3 BULLISH, > -0.3 NEUTRAL, > -1.0 BEARISH
+PREDICTION_THRESHOLDS = np.array([-1.0, -0.3, 0.3, 1.0])
+PREDICTIONS = np.array(['STRONGLY_BEARISH', 'BEARISH', 'NEUTRAL', 'BULLISH', 'STRONGLY_BULLISH'])
+CONFIDENCES = np.array(['HIGH', 'MEDIUM', 'LOW', 'MEDIUM', 'HIGH'])
 
 # KP Astrology Engine
 class KPAstrologyEngine:
-    def __init__(self):
+    def __init__(self, chart_calculator=None):
+        self.chart_calculator = chart_calculator or KPChartCalculator(
+            ephemeris_table=open_default_table(), chart_cache=chart_cache
+        )
+        self.significator = KPSignificator()
         self.planets = ['Sun', 'Moon', 'Mars', 'Mercury', 'Jupiter', 'Venus', 'Saturn', 'Rahu', 'Ketu']
         self.signs = ['Aries', 'Taurus', 'Gemini', 'Cancer', 'Leo', 'Virgo', 
                      'Libra', 'Scorpio', 'Sagittarius', 'Capricorn', 'Aquarius', 'Pisces']
-        self.sign_lords = ['Mars', 'Venus', 'Mercury', 'Moon', 'Sun', 'Mercury',
-                          'Venus', 'Mars', 'Jupiter', 'Saturn', 'Saturn', 'Jupiter']
         self.nakshatras = ['Ashwini', 'Bharani', 'Krittika', 'Rohini', 'Mrigashira', 'Ardra',
                           'Punarvasu', 'Pushya', 'Ashlesha', 'Magha', 'Purva Phalguni', 'Uttara Phalguni',
                           'Hasta', 'Chitra', 'Swati', 'Vishakha', 'Anuradha', 'Jyeshtha',
                           'Mula', 'Purva Ashadha', 'Uttara Ashadha', 'Shravana', 'Dhanishta', 'Shatabhisha',
                           'Purva Bhadrapada', 'Uttara Bhadrapada', 'Revati']
-        self.nakshatra_lords = ['Ketu', 'Venus', 'Sun', 'Moon', 'Mars', 'Rahu',
-                               'Jupiter', 'Saturn', 'Mercury'] * 3  # Repeat for 27 nakshatras
+        self.planet_weights = {
+            'Sun': 0.7, 'Moon': 0.8, 'Mars': -0.6, 'Mercury': 0.5,
+            'Jupiter': 0.9, 'Venus': 0.8, 'Saturn': -0.7, 'Rahu': -0.5, 'Ketu': -0.5
+        }
+        # score_table[mask] == sum of planet_weights over the planets in mask
+        self.score_table = score_table(self.planet_weights)
+        # Daily transit score series per (natal mask, date array)
+        self.transit_score_cache = LRUCache(maxsize=256)
 
     def calculate_birth_chart(self, listing_datetime, latitude=19.0750, longitude=72.8777):
         """Calculate KP birth chart based on listing date/time"""
         try:
-            # Simplified astronomical calculations (in real app, use Swiss Ephemeris)
-            # For demo purposes, we'll generate realistic-looking positions
-            
-            # Calculate ascendant (simplified)
-            hour_of_day = listing_datetime.hour + listing_datetime.minute/60.0
-            ascendant_degree = (hour_of_day * 15 + longitude) % 360  # Simplified formula
-            
-            # Generate planet positions
-            planet_positions = {}
-            for planet in self.planets:
-                # Generate realistic-looking positions between 0-360 degrees
-                base_position = (hash(planet + listing_datetime.isoformat()) % 360)
-                planet_positions[planet] = {
-                    'longitude': float(base_position),
-                    'sign': self.signs[int(base_position / 30)],
-                    'sign_degree': base_position % 30,
-                    'nakshatra': self.nakshatras[int(base_position / 13.33)],
-                    'nakshatra_degree': base_position % 13.33
-                }
-            
-            # Calculate house significators
-            house_significators = self.calculate_house_significators(ascendant_degree, planet_positions)
-            
-            return {
-                'ascendant_degree': ascendant_degree,
-                'ascendant_sign': self.signs[int(ascendant_degree / 30)],
-                'planet_positions': planet_positions,
-                'house_significators': house_significators,
-                'calculation_time': datetime.utcnow().isoformat()
-            }
+            chart = self.chart_calculator.calculate_stock_birth_chart(
+                None, listing_datetime.date(), listing_datetime.strftime('%H:%M'),
+                latitude, longitude
+            )
+            if chart is None:
+                return None
+            return self.birth_chart_data(chart)
             
         except Exception as e:
             print(f"Error calculating birth chart: {e}")
             return None
 
+    def calculate_birth_charts(self, listing_datetimes, latitude=19.0750, longitude=72.8777, max_workers=1):
+        """calculate_birth_chart() for many listing datetimes; identical instants are computed once"""
+        unique = sorted(set(listing_datetimes))
+        charts = self.chart_calculator.calculate_many([
+            {'listing_date': listing_datetime.date(), 'listing_time': listing_datetime.strftime('%H:%M'),
+             'exchange_lat': latitude, 'exchange_lon': longitude}
+            for listing_datetime in unique
+        ], max_workers=max_workers)
+        
+        birth_charts = {}
+        for listing_datetime, chart in zip(unique, charts):
+            try:
+                birth_charts[listing_datetime] = self.birth_chart_data(chart) if chart is not None else None
+            except Exception as e:
+                print(f"Error calculating birth chart: {e}")
+                birth_charts[listing_datetime] = None
+        return [birth_charts[listing_datetime] for listing_datetime in listing_datetimes]
+
+    def birth_chart_data(self, chart):
+        """Positions and house significators from a chart_calculator chart"""
+        ascendant_degree = chart['ascendant']
+        
+        planet_positions = {}
+        for planet in self.planets:
+            position = chart['planets'][planet]['longitude']
+            planet_positions[planet] = {
+                'longitude': position,
+                'sign': self.signs[int(position / 30)],
+                'sign_degree': position % 30,
+                'nakshatra': self.nakshatras[int(position / (360 / 27))],
+                'nakshatra_degree': position % (360 / 27)
+            }
+        
+        # Calculate house significators
+        house_significators = self.calculate_house_significators(ascendant_degree, planet_positions)
+        
+        return {
+            'ascendant_degree': ascendant_degree,
+            'ascendant_sign': self.signs[int(ascendant_degree / 30)],
+            'planet_positions': planet_positions,
+            'house_significators': house_significators,
+            'calculation_time': datetime.utcnow().isoformat()
+        }
+
     def calculate_house_significators(self, ascendant_degree, planet_positions):
         """Calculate house significators using KP rules"""
         houses = {}
         
+        # Equal-house cusps (simplified), all 12 houses in one batch call
+        planet_names = list(planet_positions)
+        batch = self.significator.find_house_significators_batch(
+            equal_house_cusps(ascendant_degree)[None, :],
+            [[planet_positions[planet]['longitude'] for planet in planet_names]],
+            planet_names
+        )
+        
         for house_num in range(1, 13):
-            # Calculate house cusp (simplified)
-            house_cusp = (ascendant_degree + (house_num - 1) * 30) % 360
-            
-            # Get sign lord
-            sign_index = int(house_cusp / 30)
-            sign_lord = self.sign_lords[sign_index]
-            
-            # Get star lord (nakshatra lord)
-            nakshatra_index = int(house_cusp / 13.3333)
-            star_lord = self.nakshatra_lords[nakshatra_index]
-            
-            # Get sub lord (simplified)
-            sub_lord = self.calculate_sub_lord(house_cusp)
-            
-            # Find planets occupying this house
-            occupants = []
-            for planet, data in planet_positions.items():
-                planet_longitude = data['longitude']
-                house_start = house_cusp
-                house_end = (house_cusp + 30) % 360
-                
-                if house_end > house_start:
-                    if house_start <= planet_longitude < house_end:
-                        occupants.append(planet)
-                else:
-                    if planet_longitude >= house_start or planet_longitude < house_end:
-                        occupants.append(planet)
-            
+            h = house_num - 1
             houses[house_num] = {
-                'cuspal_sign_lord': sign_lord,
-                'cuspal_star_lord': star_lord,
-                'cuspal_sub_lord': sub_lord,
-                'occupying_planets': occupants,
-                'all_significators': list(set([sign_lord, star_lord, sub_lord] + occupants))
+                'cuspal_sign_lord': BODIES[batch['sign_lord'][0, h]],
+                'cuspal_star_lord': BODIES[batch['star_lord'][0, h]],
+                'cuspal_sub_lord': BODIES[batch['sub_lord'][0, h]],
+                'cuspal_sub_sub_lord': BODIES[batch['sub_sub_lord'][0, h]],
+                'occupying_planets': [BODIES[code] for code in np.nonzero(batch['occupants'][0, h])[0]],
+                'all_significators': [BODIES[code] for code in np.nonzero(batch['significators'][0, h])[0]]
             }
         
         return houses
 
     def calculate_sub_lord(self, longitude):
-        """Calculate sub-lord (simplified KP method)"""
-        nakshatra_index = int(longitude / 13.3333)
-        sub_lords = ['Ketu', 'Venus', 'Sun', 'Moon', 'Mars', 'Rahu',
-                    'Jupiter', 'Saturn', 'Mercury']
-        return sub_lords[nakshatra_index % 9]
-
-    def analyze_correlation(self, stock_prices, birth_chart):
-        """Analyze correlation between planetary positions and price movements"""
+        """Calculate sub-lord from the KP sub table"""
+        return kp_sub_lord(longitude)
+
+    def significator_masks(self, house_significators):
+        """Encode per-house all_significators lists as 12 planet bitmasks"""
+        masks = []
+        for house_num in range(1, 13):
+            house = house_significators.get(str(house_num)) or house_significators.get(house_num) or {}
+            masks.append(encode_planets(house.get('all_significators', [])))
+        return np.array(masks, dtype=np.uint16)
+
+    def analyze_correlation(self, price_series, birth_chart, window=10, start=None, end=None,
+                            totals=None):
+        """Analyze correlation between planetary positions and price movements
+        
+        price_series is a (dates, closes) pair of arrays ordered by date;
+        daily_analysis covers the last `window` days or start..end if given.
+        With totals=(correct, days, up_days, up_calls) from a
+        CorrelationSummary the series only needs to cover the reported window
+        and accuracy and significance come from totals.
+        """
         try:
-            if not stock_prices or len(stock_prices) < 10:
+            dates, closes = price_series
+            if totals is None and len(closes) < 10:
                 return {"error": "Insufficient price data. Need at least 10 days of data."}
             
-            print(f"Analyzing correlation with {len(stock_prices)} price records")  # Debug
-            
-            analysis = []
-            planet_influences = {
-                'Sun': 0.7, 'Moon': 0.8, 'Mars': -0.6, 'Mercury': 0.5,
-                'Jupiter': 0.9, 'Venus': 0.8, 'Saturn': -0.7, 'Rahu': -0.5, 'Ketu': -0.5
-            }
+            print(f"Analyzing correlation with {len(closes)} price records")  # Debug
             
-            # Get 2nd and 11th house significators (wealth and gains)
-            house_2_significators = birth_chart['house_significators'].get('2', {}).get('all_significators', [])
-            house_11_significators = birth_chart['house_significators'].get('11', {}).get('all_significators', [])
-            all_significators = list(set(house_2_significators + house_11_significators))
+            # Union of 2nd and 11th house significators (wealth and gains)
+            masks = birth_chart['significator_masks']
+            wealth_mask = int(masks[1] | masks[10])
+            all_significators = decode_mask(wealth_mask)
             
             print(f"Significators found: {all_significators}")  # Debug
             
-            # Simple correlation analysis
-            total_days = len(stock_prices)
-            correct_predictions = 0
+            # Returns are aligned with the second and later dates
+            return_dates = dates[1:]
+            astro_scores = self.daily_astro_scores(return_dates, wealth_mask)
             
-            for i in range(1, len(stock_prices)):
-                price_today = stock_prices[i]
-                price_yesterday = stock_prices[i-1]
-                
-                # Calculate price change percentage
-                if price_yesterday.close_price and price_yesterday.close_price > 0:
-                    price_change = ((price_today.close_price - price_yesterday.close_price) / 
-                                  price_yesterday.close_price) * 100
-                else:
-                    price_change = 0
-                
-                # Calculate astrological score
-                astro_score = 0
-                for planet in all_significators:
-                    if planet in planet_influences:
-                        astro_score += planet_influences[planet]
-                
-                # Simple prediction: positive score = bullish, negative = bearish
-                predicted_direction = 1 if astro_score > 0 else -1
-                actual_direction = 1 if price_change > 0 else -1
-                
-                if predicted_direction == actual_direction:
-                    correct_predictions += 1
-                
-                analysis.append({
-                    'date': price_today.date.isoformat(),
-                    'price_change': round(price_change, 2),
-                    'astro_score': round(astro_score, 2),
-                    'predicted_direction': 'UP' if predicted_direction == 1 else 'DOWN',
-                    'actual_direction': 'UP' if actual_direction == 1 else 'DOWN',
-                    'prediction_correct': predicted_direction == actual_direction
-                })
+            returns = correlation.daily_returns(closes)
+            predicted, actual, hits, valid = correlation.direction_hits(returns, astro_scores)
+            if totals is None:
+                totals = correlation.direction_counts(predicted, actual, hits, valid)
+            correct_predictions, days_analyzed = int(totals[0]), int(totals[1])
+            accuracy = round(correct_predictions / days_analyzed * 100, 2) if days_analyzed else 0.0
+            tests = significance.significance(*totals, resamples=SIGNIFICANCE_RESAMPLES)
+            p_value = round(float(tests['p_value'][0]), 4)
             
-            accuracy = round((correct_predictions / (total_days - 1)) * 100, 2) if total_days > 1 else 0
+            rows = correlation.window_slice(return_dates, window, start, end)
+            analysis = correlation.daily_rows(return_dates, returns, astro_scores,
+                                              predicted, actual, hits, rows)
             
-            print(f"Analysis complete: {correct_predictions}/{total_days-1} correct, {accuracy}% accuracy")  # Debug
+            print(f"Analysis complete: {correct_predictions}/{days_analyzed} correct, {accuracy}% accuracy")  # Debug
             
             return {
                 'accuracy': accuracy,
-                'total_days_analyzed': total_days - 1,
+                'total_days_analyzed': days_analyzed,
                 'correct_predictions': correct_predictions,
+                'p_value': p_value,
+                'confidence_interval': [float(tests['ci_low'][0]), float(tests['ci_high'][0])],
                 'key_significators': all_significators,
-                'daily_analysis': analysis[-10:],  # Last 10 days
-                'insights': self.generate_insights(accuracy, all_significators)
+                'daily_analysis': analysis,
+                'insights': self.generate_insights(accuracy, all_significators, p_value)
             }
             
         except Exception as e:
             print(f"Error in analyze_correlation: {e}")  # Debug
             return {"error": f"Analysis failed: {str(e)}"}
 
-    def generate_insights(self, accuracy, significators):
+    def walk_forward(self, price_series, wealth_mask, windows=(60, 120, 250), step=20):
+        """Accuracy of the daily transit score over rolling windows of return days"""
+        dates, closes = price_series
+        return_dates = dates[1:]
+        returns = correlation.daily_returns(closes)
+        scores = self.daily_astro_scores(return_dates, wealth_mask)
+        hits, valid = correlation.direction_hits(returns, scores)[2:]
+        
+        result = {}
+        for window in windows:
+            ends, accuracy, correct, total = correlation.rolling_accuracy(hits, valid, window, step)
+            rows = []
+            for start, end, percent, days in zip(return_dates[ends - window + 1].tolist(),
+                                                 return_dates[ends].tolist(),
+                                                 accuracy.tolist(), total.tolist()):
+                rows.append({
+                    'start': start.isoformat(),
+                    'end': end.isoformat(),
+                    'accuracy': percent,
+                    'days': days
+                })
+            result[str(window)] = {
+                'count': len(rows),
+                'mean_accuracy': round(float(accuracy.mean()), 2) if len(rows) else None,
+                'min_accuracy': float(accuracy.min()) if len(rows) else None,
+                'max_accuracy': float(accuracy.max()) if len(rows) else None,
+                'std_accuracy': round(float(accuracy.std()), 2) if len(rows) else None,
+                'share_above_50': round(float((accuracy > 50).mean()) * 100, 2) if len(rows) else None,
+                'windows': rows
+            }
+        return result
+
+    def correlation_counts(self, price_series, wealth_mask, previous_close=None):
+        """(correct, days, up_days, up_calls) over a price series, continuing from previous_close if given"""
+        dates, closes = price_series
+        if previous_close is not None:
+            closes = np.concatenate([[previous_close], closes])
+        else:
+            dates = dates[1:]
+        if not len(dates):
+            return 0, 0, 0, 0
+        
+        returns = correlation.daily_returns(closes)
+        scores = self.daily_astro_scores(dates, wealth_mask)
+        counts = correlation.direction_counts(*correlation.direction_hits(returns, scores))
+        return tuple(int(count) for count in counts)
+
+    def scoring_fingerprint(self, wealth_mask):
+        """Changes whenever the natal mask or the scoring weights change"""
+        weights = ','.join(f'{planet}={self.planet_weights[planet]}' for planet in sorted(self.planet_weights))
+        key = f'{transit_scores.SCORING_VERSION}|{wealth_mask}|{weights}'
+        return hashlib.sha1(key.encode()).hexdigest()
+
+    def daily_astro_scores(self, dates, wealth_mask):
+        """Transit score for each date (datetime64[D] array), cached by mask and the full date array"""
+        if not len(dates):
+            return np.zeros(0)
+        dates = np.asarray(dates, dtype='datetime64[D]')
+        key = (wealth_mask, len(dates), hashlib.sha1(np.ascontiguousarray(dates).tobytes()).hexdigest())
+        scores = self.transit_score_cache.get(key)
+        if scores is None:
+            star_lords, sub_lords = transit_scores.transit_lords(self.chart_calculator, dates)
+            scores = transit_scores.transit_score_series(
+                star_lords, sub_lords, wealth_mask, self.planet_weights
+            )
+            scores.flags.writeable = False
+            self.transit_score_cache.put(key, scores)
+        return scores
+
+    def generate_insights(self, accuracy, significators, p_value=None):
         """Generate insights based on correlation analysis"""
         insights = []
         
-        if accuracy > 70:
+        if p_value is not None:
+            if p_value < 0.01 and accuracy > 50:
+                insights.append(f"Strong, statistically significant correlation (p={p_value:.3f})")
+            elif p_value < 0.05 and accuracy > 50:
+                insights.append(f"Moderate, statistically significant correlation (p={p_value:.3f})")
+            else:
+                insights.append(f"No statistically significant correlation (p={p_value:.3f}) - consider other market factors")
+        elif accuracy > 70:
             insights.append("Strong correlation between KP factors and price movements")
         elif accuracy > 55:
             insights.append("Moderate correlation observed")
@@ -266,50 +322,81 @@ class KPAstrologyEngine:
         
         return insights
 
+    def predict_range(self, birth_chart, start, end):
+        """Prediction for every date in [start, end] from one batched transit pass"""
+        masks = birth_chart['significator_masks']
+        house_2_mask, house_11_mask = int(masks[1]), int(masks[10])
+        dates = np.arange(np.datetime64(start, 'D'), np.datetime64(end, 'D') + 1)
+        
+        natal_score = float(self.score_table[house_2_mask] + self.score_table[house_11_mask])
+        transit = self.daily_astro_scores(dates, house_2_mask | house_11_mask)
+        scores = np.round(natal_score + transit, 2)
+        predictions, confidences = self.prediction_labels(scores)
+        
+        return {
+            'start': str(dates[0]),
+            'end': str(dates[-1]),
+            'natal_score': round(natal_score, 2),
+            'key_factors': decode_mask(house_2_mask) + decode_mask(house_11_mask),
+            'predictions': [
+                {
+                    'date': date.isoformat(),
+                    'prediction': prediction,
+                    'confidence': confidence,
+                    'prediction_score': score,
+                    'transit_score': transit_score
+                }
+                for date, prediction, confidence, score, transit_score in zip(
+                    dates.tolist(), predictions.tolist(), confidences.tolist(),
+                    scores.tolist(), np.round(transit, 2).tolist()
+                )
+            ]
+        }
+
+    def prediction_labels(self, scores):
+        """(prediction, confidence) for a score, or arrays of them for an array of scores"""
+        levels = np.digitize(scores, PREDICTION_THRESHOLDS, right=True)
+        if np.ndim(levels) == 0:
+            return str(PREDICTIONS[levels]), str(CONFIDENCES[levels])
+        return PREDICTIONS[levels], CONFIDENCES[levels]
+
+    def screen_scores(self, masks, date):
+        """(natal, transit) score arrays for (stocks x 12) masks on one date"""
+        house_2, house_11 = masks[:, 1], masks[:, 10]
+        natal = self.score_table[house_2] + self.score_table[house_11]
+        star_lords, sub_lords = transit_scores.transit_lords(
+            self.chart_calculator, np.array([date], dtype='datetime64[D]')
+        )
+        transit = transit_scores.transit_score_series(
+            star_lords, sub_lords, (house_2 | house_11)[:, None], self.planet_weights
+        )
+        return natal, transit
+
     def predict_future_movement(self, birth_chart, prediction_date):
         """Predict future price movement based on KP astrology"""
         try:
-            # Simplified prediction based on current significators
-            house_2 = birth_chart['house_significators'].get('2', {})
-            house_11 = birth_chart['house_significators'].get('11', {})
+            # Natal 2nd/11th significators plus the transits on the prediction date
+            masks = birth_chart['significator_masks']
+            house_2_mask, house_11_mask = int(masks[1]), int(masks[10])
+            date = np.datetime64(prediction_date or datetime.utcnow().date(), 'D')
             
             # Calculate prediction score
-            score = 0
-            planet_weights = {
-                'Sun': 0.7, 'Moon': 0.8, 'Mars': -0.6, 'Mercury': 0.5,
-                'Jupiter': 0.9, 'Venus': 0.8, 'Saturn': -0.7, 'Rahu': -0.5, 'Ketu': -0.5
-            }
+            natal_score = float(self.score_table[house_2_mask] + self.score_table[house_11_mask])
+            transit_score = float(self.daily_astro_scores(
+                np.array([date]), house_2_mask | house_11_mask
+            )[0])
+            score = natal_score + transit_score
             
-            house_2_significators = house_2.get('all_significators', [])
-            house_11_significators = house_11.get('all_significators', [])
-            
-            for planet in house_2_significators + house_11_significators:
-                if planet in planet_weights:
-                    score += planet_weights[planet]
-            
-            # Determine prediction
-            if score > 1.0:
-                prediction = "STRONGLY_BULLISH"
-                confidence = "HIGH"
-            elif score > 0.3:
-                prediction = "BULLISH" 
-                confidence = "MEDIUM"
-            elif score > -0.3:
-                prediction = "NEUTRAL"
-                confidence = "LOW"
-            elif score > -1.0:
-                prediction = "BEARISH"
-                confidence = "MEDIUM"
-            else:
-                prediction = "STRONGLY_BEARISH"
-                confidence = "HIGH"
+            prediction, confidence = self.prediction_labels(score)
             
             return {
                 'prediction': prediction,
                 'confidence': confidence,
                 'prediction_score': round(score, 2),
-                'key_factors': house_2_significators + house_11_significators,
-                'prediction_date': prediction_date
+                'natal_score': round(natal_score, 2),
+                'transit_score': round(transit_score, 2),
+                'key_factors': decode_mask(house_2_mask) + decode_mask(house_11_mask),
+                'prediction_date': prediction_date or str(date)
             }
             
         except Exception as e:
@@ -326,6 +413,54 @@ class KPAstrologyEngine:
 # Initialize KP Astrology Engine
 kp_engine = KPAstrologyEngine()
 
+# Transit events: persisted index if built, otherwise computed per range
+transit_event_engine = TransitEventEngine(kp_engine.chart_calculator)
+transit_event_index = load_default_index()
+transit_event_cache = LRUCache(maxsize=64)
+MAX_TRANSIT_EVENT_DAYS = 366
+
+# Longest /predict-range request (five years)
+MAX_PREDICTION_DAYS = 5 * 366
+
+# Natal masks of every stock for the screener, reloaded when the charts change
+significator_store = SignificatorStore()
+screener_cache = LRUCache(maxsize=32)
+MAX_SCREENER_PAGE_SIZE = 500
+
+# Columnar copy of each stock's prices for analytics reads
+price_store = PriceStore()
+
+# Largest page of /prices (keyset-paginated by date)
+MAX_PRICE_PAGE_SIZE = 1000
+
+# Rows per /api/stocks/bulk import
+MAX_BULK_STOCKS = 5000
+
+# Weight-set sweeps per request (baseline weights included)
+MAX_BACKTEST_WEIGHT_SETS = 10000
+
+# Processes a chart batch or a backtest may fork; 1 computes in the worker itself
+CHART_WORKERS = int(os.environ.get('CHART_WORKERS', 1))
+ANALYSIS_PROCESSES = int(os.environ.get('ANALYSIS_PROCESSES', 1))
+
+# Larger requests run as background jobs (202 with the job) instead of in the web worker:
+# weight sets x price bars for a backtest, resamples x stocks for significance tests,
+# and price bars to load (or fold into a correlation summary)
+MAX_INLINE_BACKTEST_CELLS = 5000000
+MAX_INLINE_SIGNIFICANCE_DRAWS = 5000000
+MAX_INLINE_PRICE_BARS = 20000
+
+# Live ruling planets, one service (and per-minute cache) per location
+ruling_planet_services = LRUCache(maxsize=16)
+
+# Correlation and prediction responses, keyed by the stock's data versions
+analysis_cache = LRUCache(maxsize=1024)
+
+def analysis_cache_key(kind, stock, *params):
+    """Key that changes whenever the stock's prices, chart or the scoring change"""
+    return (kind, stock.id, stock.price_version or 0, stock.chart_version or 0,
+            transit_scores.SCORING_VERSION) + params
+
 # Initialize Stock Data Manager
 # Pure Python Stock Data Manager (No external dependencies)
 class StockDataManager:
@@ -467,6 +602,13 @@ class StockDataManager:
 # Initialize Stock Data Manager
 stock_data_manager = StockDataManager()
 
+# Background jobs: a bounded pool in this process, state in the job table
+job_queue = JobQueue(app, db, Job,
+                     max_workers=int(os.environ.get('JOB_WORKERS', 2)),
+                     max_pending=int(os.environ.get('JOB_QUEUE_SIZE', 100)))
+with app.app_context():
+    job_queue.recover()
+
 
 # HTML Template (make sure this is properly closed)
 HTML_TEMPLATE = '''
@@ -973,6 +1115,16 @@ async function selectStock(stockId) {
             }
         }
 
+     // Large requests are queued as jobs (202); poll until the result is ready
+async function awaitJobResult(response) {
+    while (response.status === 202) {
+        const job = await response.json();
+        await new Promise(resolve => setTimeout(resolve, 2000));
+        response = await fetch(job.result_url);
+    }
+    return response;
+}
+
      // Run correlation analysis
 async function runCorrelationAnalysis(stock) {
     const correlationContent = document.getElementById('correlationContent');
@@ -980,9 +1132,9 @@ async function runCorrelationAnalysis(stock) {
     try {
         correlationContent.innerHTML = '<div class="result info">Analyzing correlation... This may take a moment.</div>';
         
-        const response = await fetch(`/api/stocks/${stock.id}/correlation`, {
+        const response = await awaitJobResult(await fetch(`/api/stocks/${stock.id}/correlation`, {
             method: 'POST'
-        });
+        }));
         
         const analysis = await response.json();
         
@@ -1186,12 +1338,13 @@ async function getCurrentPrice(stock) {
 }
 
         // Load price data
-        async function loadPriceData(stockId) {
+        async function loadPriceData(stockId, cursor = '') {
             const priceDataContent = document.getElementById('priceDataContent');
             
             try {
-                const response = await fetch(`/api/stocks/${stockId}/prices`);
-                const prices = await response.json();
+                const response = await fetch(`/api/stocks/${stockId}/prices?limit=20${cursor}`);
+                const page = await response.json();
+                const prices = page.prices || [];
                 
                 if (prices.length === 0) {
                     priceDataContent.innerHTML = '<div class="result warning">No price data available. Generate demo data first.</div>';
@@ -1199,7 +1352,7 @@ async function getCurrentPrice(stock) {
                 }
                 
                 priceDataContent.innerHTML = `
-                    <h4>📊 Price History (Last 20 Days)</h4>
+                    <h4>📊 Price History (${prices[prices.length - 1].date} to ${prices[0].date})</h4>
                     <div style="max-height: 400px; overflow-y: auto;">
                         <table style="width: 100%; border-collapse: collapse;">
                             <thead>
@@ -1213,7 +1366,7 @@ async function getCurrentPrice(stock) {
                                 </tr>
                             </thead>
                             <tbody>
-                                ${prices.slice(-20).map(price => `
+                                ${prices.map(price => `
                                     <tr>
                                         <td style="padding: 8px; border: 1px solid #ddd;">${price.date}</td>
                                         <td style="padding: 8px; border: 1px solid #ddd;">${price.open.toFixed(2)}</td>
@@ -1226,6 +1379,10 @@ async function getCurrentPrice(stock) {
                             </tbody>
                         </table>
                     </div>
+                    <div style="margin-top: 10px;">
+                        ${page.next_after ? `<button onclick="loadPriceData(${stockId}, '&after=${page.next_after}')">← Newer</button>` : ''}
+                        ${page.next_before ? `<button onclick="loadPriceData(${stockId}, '&before=${page.next_before}')">Older →</button>` : ''}
+                    </div>
                 `;
             } catch (error) {
                 priceDataContent.innerHTML = `<div class="error">Error loading price data: ${error.message}</div>`;
@@ -1253,6 +1410,149 @@ async function getCurrentPrice(stock) {
 # FLASK API ROUTES
 # =============================================================================
 
+def chart_significator_masks(kp_chart):
+    """Per-house significator bitmasks, backfilled from the JSON column for older charts"""
+    if kp_chart.significator_masks is None:
+        kp_chart.significator_masks = pack_masks(kp_engine.significator_masks(kp_chart.house_significators))
+        db.session.commit()
+    return unpack_masks(kp_chart.significator_masks)
+
+def significator_version():
+    """Changes whenever a chart is added or rebuilt, by any worker process"""
+    count, last_id, chart_versions = db.session.query(
+        func.count(KPBirthChart.id), func.max(KPBirthChart.id),
+        func.sum(func.coalesce(Stock.chart_version, 0))
+    ).join(Stock, Stock.id == KPBirthChart.stock_id).one()
+    return (count, last_id, int(chart_versions or 0))
+
+def load_significator_store():
+    """The in-memory significator store, reloaded when the charts in the database changed"""
+    version = significator_version()
+    if significator_store.version != version:
+        rows = db.session.query(Stock.id, Stock.symbol, KPBirthChart).join(
+            KPBirthChart, KPBirthChart.stock_id == Stock.id).all()
+        significator_store.load(
+            ((stock_id, symbol, chart_significator_masks(kp_chart)) for stock_id, symbol, kp_chart in rows),
+            version
+        )
+    return significator_store
+
+def kp_chart_fields(stock_id, birth_chart_data):
+    """KPBirthChart column values for a calculated chart"""
+    return {
+        'stock_id': stock_id,
+        'ascendant_degree': birth_chart_data['ascendant_degree'],
+        'planet_positions': birth_chart_data['planet_positions'],
+        'house_significators': birth_chart_data['house_significators'],
+        'significator_masks': pack_masks(
+            kp_engine.significator_masks(birth_chart_data['house_significators'])
+        )
+    }
+
+def build_kp_chart(stock_id, birth_chart_data):
+    """KPBirthChart row (not yet added to the session) for a calculated chart"""
+    return KPBirthChart(**kp_chart_fields(stock_id, birth_chart_data))
+
+def parse_bulk_rows(body, csv_format):
+    """(line, row, error) for each record of a CSV (with header) or NDJSON body"""
+    if csv_format:
+        reader = csv.DictReader(io.StringIO(body))
+        return [(reader.line_num, row, None) for row in reader]
+    
+    rows = []
+    for line, record in enumerate(body.splitlines(), start=1):
+        if not record.strip():
+            continue
+        try:
+            row = json.loads(record)
+        except ValueError as e:
+            rows.append((line, None, f'Invalid JSON: {e}'))
+            continue
+        if not isinstance(row, dict):
+            rows.append((line, None, 'Expected a JSON object'))
+            continue
+        rows.append((line, row, None))
+    return rows
+
+def validate_bulk_row(row):
+    """(stock fields, listing datetime, error) for one import row"""
+    symbol = str(row.get('symbol') or '').strip().upper()
+    name = str(row.get('name') or symbol).strip()
+    listing_date = str(row.get('listing_date') or '').strip()
+    listing_time = str(row.get('listing_time') or '10:00').strip()
+    if not symbol:
+        return None, None, 'symbol is required'
+    if len(symbol) > 20 or len(name) > 100:
+        return None, None, 'symbol is limited to 20 characters and name to 100'
+    try:
+        listing_datetime = datetime.strptime(f'{listing_date} {listing_time}', '%Y-%m-%d %H:%M')
+    except ValueError:
+        return None, None, 'listing_date must be YYYY-MM-DD and listing_time HH:MM'
+    fields = {'symbol': symbol, 'name': name, 'listing_date': listing_date, 'listing_time': listing_time}
+    return fields, listing_datetime, None
+
+def generate_charts(data, progress=None):
+    """(Re)build KP charts for data['stock_ids'], or every stock without one; returns (payload, status)"""
+    query = Stock.query
+    if data.get('stock_ids'):
+        query = query.filter(Stock.id.in_(data['stock_ids']))
+    else:
+        query = query.filter(~Stock.id.in_(db.session.query(KPBirthChart.stock_id)))
+    stocks = query.order_by(Stock.id).all()
+    
+    # Calculate every chart first, then replace them all in one transaction
+    built, failed = [], []
+    for index, stock in enumerate(stocks):
+        listing_datetime = datetime.strptime(
+            f"{stock.listing_date} {stock.listing_time or '10:00'}", '%Y-%m-%d %H:%M'
+        )
+        birth_chart_data = kp_engine.calculate_birth_chart(listing_datetime)
+        if birth_chart_data:
+            built.append((stock, birth_chart_data))
+        else:
+            failed.append(stock.symbol)
+        if progress:
+            progress((index + 1) / len(stocks), f'{index + 1}/{len(stocks)} charts')
+    
+    for stock, birth_chart_data in built:
+        KPBirthChart.query.filter_by(stock_id=stock.id).delete()
+        db.session.add(build_kp_chart(stock.id, birth_chart_data))
+        stock.chart_version = (stock.chart_version or 0) + 1
+    db.session.commit()
+    
+    return {'built': len(built), 'failed': failed}, 200
+
+def respond(payload, status=200):
+    return jsonify(payload), status
+
+def job_response(job):
+    """202 with a queued job and where to poll for it"""
+    payload = job.to_dict()
+    payload['status_url'] = f'/api/jobs/{job.id}'
+    payload['result_url'] = f'/api/jobs/{job.id}/result'
+    return jsonify(payload), 202
+
+def run_or_enqueue(kind, params, background, report):
+    """report(params) inline, or as a background job (202) when background is set"""
+    if background:
+        return job_response(job_queue.submit(kind, params))
+    return respond(*report(params))
+
+def price_bar_count(stock_ids=None):
+    """Stored price bars of the given stocks (all stocks if None)"""
+    query = db.session.query(func.count(StockPrice.id))
+    if stock_ids:
+        query = query.filter(StockPrice.stock_id.in_(stock_ids))
+    return query.scalar()
+
+def unsummarized_bar_count(stock_id):
+    """Price bars a correlation request would still have to fold into the stock's summary"""
+    query = db.session.query(func.count(StockPrice.id)).filter(StockPrice.stock_id == stock_id)
+    last_date = db.session.query(CorrelationSummary.last_date).filter_by(stock_id=stock_id).scalar()
+    if last_date is not None:
+        query = query.filter(StockPrice.date > last_date)
+    return query.scalar()
+
 @app.route('/')
 def index():
     return render_template_string(HTML_TEMPLATE)
@@ -1294,12 +1594,7 @@ def add_stock():
         birth_chart_data = kp_engine.calculate_birth_chart(listing_datetime)
         
         if birth_chart_data:
-            kp_chart = KPBirthChart(
-                stock_id=stock.id,
-                ascendant_degree=birth_chart_data['ascendant_degree'],
-                planet_positions=birth_chart_data['planet_positions'],
-                house_significators=birth_chart_data['house_significators']
-            )
+            kp_chart = build_kp_chart(stock.id, birth_chart_data)
             db.session.add(kp_chart)
             db.session.commit()
         
@@ -1308,6 +1603,65 @@ def add_stock():
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/stocks/bulk', methods=['POST'])
+def bulk_add_stocks():
+    """Add stocks from NDJSON or CSV (?format=csv or text/csv) with their KP charts in one transaction"""
+    try:
+        csv_format = request.args.get('format') == 'csv' or request.mimetype == 'text/csv'
+        rows = parse_bulk_rows(request.get_data(as_text=True), csv_format)
+        if not rows:
+            return jsonify({'error': 'No rows to import'}), 400
+        if len(rows) > MAX_BULK_STOCKS:
+            return jsonify({'error': f'At most {MAX_BULK_STOCKS} stocks per import'}), 400
+        
+        # Validate every row before writing anything
+        errors, valid, symbols = [], [], set()
+        for line, row, error in rows:
+            if error is None:
+                fields, listing_datetime, error = validate_bulk_row(row)
+            if error is None and fields['symbol'] in symbols:
+                error = f"Duplicate symbol {fields['symbol']} in this import"
+            if error is not None:
+                errors.append({'line': line, 'symbol': (row or {}).get('symbol'), 'error': error})
+                continue
+            symbols.add(fields['symbol'])
+            valid.append((line, fields, listing_datetime))
+        
+        existing = {symbol for (symbol,) in db.session.query(Stock.symbol).filter(Stock.symbol.in_(list(symbols)))}
+        for line, fields, _ in valid:
+            if fields['symbol'] in existing:
+                errors.append({'line': line, 'symbol': fields['symbol'], 'error': f"Stock {fields['symbol']} already exists"})
+        valid = [entry for entry in valid if entry[1]['symbol'] not in existing]
+        
+        # Charts in one batch; stocks listed at the same instant share one calculation
+        listing_datetimes = [listing_datetime for _, _, listing_datetime in valid]
+        birth_charts = kp_engine.calculate_birth_charts(listing_datetimes, max_workers=CHART_WORKERS)
+        
+        db.session.bulk_insert_mappings(Stock, [fields for _, fields, _ in valid])
+        stock_ids = dict(db.session.query(Stock.symbol, Stock.id).filter(
+            Stock.symbol.in_([fields['symbol'] for _, fields, _ in valid])))
+        
+        charts = []
+        for (line, fields, _), birth_chart_data in zip(valid, birth_charts):
+            if birth_chart_data is None:
+                errors.append({'line': line, 'symbol': fields['symbol'],
+                               'error': 'KP chart calculation failed; stock added without a chart'})
+                continue
+            charts.append((fields['symbol'], kp_chart_fields(stock_ids[fields['symbol']], birth_chart_data)))
+        db.session.bulk_insert_mappings(KPBirthChart, [chart for _, chart in charts])
+        db.session.commit()
+        
+        return jsonify({
+            'received': len(rows),
+            'added': len(valid),
+            'charts': len(charts),
+            'unique_instants': len(set(listing_datetimes)),
+            'errors': sorted(errors, key=lambda error: error['line'])
+        }), 200 if valid or not errors else 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/stocks/<int:stock_id>')
 def get_stock(stock_id):
     try:
@@ -1334,61 +1688,94 @@ def get_kp_chart(stock_id):
 
 @app.route('/api/stocks/<int:stock_id>/prices')
 def get_stock_prices(stock_id):
+    """Newest-first page of prices; ?before=/?after= a date page older/newer (keyset, no OFFSET)"""
     try:
-        prices = StockPrice.query.filter_by(stock_id=stock_id).order_by(StockPrice.date.desc()).limit(100).all()
-        return jsonify([price.to_dict() for price in prices])
+        limit = min(max(int(request.args.get('limit', 100)), 1), MAX_PRICE_PAGE_SIZE)
+        before = request.args.get('before')
+        after = request.args.get('after')
+        
+        query = StockPrice.query.filter_by(stock_id=stock_id)
+        if after:
+            # Oldest rows after the cursor, flipped back to newest first
+            query = query.filter(StockPrice.date > datetime.strptime(after, '%Y-%m-%d').date())
+            prices = query.order_by(StockPrice.date.asc()).limit(limit + 1).all()
+            has_newer, has_older = len(prices) > limit, True
+            prices = prices[:limit][::-1]
+        else:
+            if before:
+                query = query.filter(StockPrice.date < datetime.strptime(before, '%Y-%m-%d').date())
+            prices = query.order_by(StockPrice.date.desc()).limit(limit + 1).all()
+            has_newer, has_older = bool(before), len(prices) > limit
+            prices = prices[:limit]
+        
+        return jsonify({
+            'prices': [price.to_dict() for price in prices],
+            'limit': limit,
+            'next_before': prices[-1].date.isoformat() if prices and has_older else None,
+            'next_after': prices[0].date.isoformat() if prices and has_newer else None
+        })
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def generate_price_history(stock_id, data):
+    """Replace a stock's prices with simulated ones; returns (payload, status)"""
+    days = data.get('days', 30)
+    
+    stock = Stock.query.get_or_404(stock_id)
+    
+    # Clear existing prices (and the correlation summary built from them)
+    StockPrice.query.filter_by(stock_id=stock_id).delete()
+    CorrelationSummary.query.filter_by(stock_id=stock_id).delete()
+    stock.price_version = (stock.price_version or 0) + 1
+    
+    # Generate realistic price data
+    prices_data = stock_data_manager.get_realistic_price_data(stock.symbol, days)
+    
+    for price_data in prices_data:
+        price = StockPrice(
+            stock_id=stock_id,
+            date=price_data['date'],
+            open_price=price_data['open'],
+            high_price=price_data['high'],
+            low_price=price_data['low'],
+            close_price=price_data['close'],
+            volume=price_data['volume']
+        )
+        db.session.add(price)
+    
+    db.session.commit()
+    
+    # Refresh the columnar copy for the new price version
+    load_price_columns(stock)
+    
+    # Calculate statistics for feedback
+    if prices_data:
+        first_price = prices_data[0]['close']
+        last_price = prices_data[-1]['close']
+        price_range = f"₹{first_price:.2f} - ₹{last_price:.2f}"
+        change_pct = ((last_price - first_price) / first_price) * 100
+        change_direction = "📈" if change_pct > 0 else "📉" if change_pct < 0 else "➡️"
+    else:
+        price_range = "No data"
+        change_pct = 0
+        change_direction = ""
+    
+    return {
+        'generated': len(prices_data), 
+        'message': 'Realistic stock prices generated successfully',
+        'symbol': stock.symbol,
+        'price_range': price_range,
+        'change_percentage': round(change_pct, 2),
+        'change_direction': change_direction,
+        'data_source': 'AI-Powered Realistic Simulation'
+    }, 200
+
 @app.route('/api/stocks/<int:stock_id>/generate-prices', methods=['POST'])
 def generate_prices(stock_id):
     try:
-        data = request.get_json()
-        days = data.get('days', 30)
-        
-        stock = Stock.query.get_or_404(stock_id)
-        
-        # Clear existing prices
-        StockPrice.query.filter_by(stock_id=stock_id).delete()
-        
-        # Generate realistic price data
-        prices_data = stock_data_manager.get_realistic_price_data(stock.symbol, days)
-        
-        for price_data in prices_data:
-            price = StockPrice(
-                stock_id=stock_id,
-                date=price_data['date'],
-                open_price=price_data['open'],
-                high_price=price_data['high'],
-                low_price=price_data['low'],
-                close_price=price_data['close'],
-                volume=price_data['volume']
-            )
-            db.session.add(price)
-        
-        db.session.commit()
-        
-        # Calculate statistics for feedback
-        if prices_data:
-            first_price = prices_data[0]['close']
-            last_price = prices_data[-1]['close']
-            price_range = f"₹{first_price:.2f} - ₹{last_price:.2f}"
-            change_pct = ((last_price - first_price) / first_price) * 100
-            change_direction = "📈" if change_pct > 0 else "📉" if change_pct < 0 else "➡️"
-        else:
-            price_range = "No data"
-            change_pct = 0
-            change_direction = ""
-        
-        return jsonify({
-            'generated': len(prices_data), 
-            'message': 'Realistic stock prices generated successfully',
-            'symbol': stock.symbol,
-            'price_range': price_range,
-            'change_percentage': round(change_pct, 2),
-            'change_direction': change_direction,
-            'data_source': 'AI-Powered Realistic Simulation'
-        })
+        return respond(*generate_price_history(stock_id, request.get_json(silent=True) or {}))
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
@@ -1411,44 +1798,177 @@ def get_current_price(stock_id):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
         
+def price_store_version(stock):
+    """Store version: the price version, scoped to this database's stock row"""
+    created = stock.created_at.strftime('%Y%m%d%H%M%S%f') if stock.created_at else '0'
+    return f'{created}-{stock.price_version or 0}'
+
+def load_price_columns(stock, columns=('date', 'close')):
+    """Memory-mapped price columns of a stock, rebuilt from the database when not stored"""
+    version = price_store_version(stock)
+    stored = price_store.read(stock.id, version, columns)
+    if stored is not None:
+        return stored
+    
+    rows = db.session.query(
+        StockPrice.date, StockPrice.open_price, StockPrice.high_price,
+        StockPrice.low_price, StockPrice.close_price, StockPrice.volume
+    ).filter_by(stock_id=stock.id).order_by(StockPrice.date.asc()).all()
+    all_columns = price_columns(rows)
+    try:
+        price_store.write(stock.id, version, all_columns)
+    except OSError as e:
+        print(f"Error writing price store for {stock.symbol}: {e}")
+    return {name: all_columns[name] for name in columns}
+
+def update_correlation_summary(stock, masks):
+    """Fold bars newer than the stored summary into its counts.
+    
+    The summary is rebuilt from all prices when it is missing or the chart
+    or scoring weights changed (fingerprint mismatch).
+    """
+    wealth_mask = int(masks[1] | masks[10])
+    fingerprint = kp_engine.scoring_fingerprint(wealth_mask)
+    summary = CorrelationSummary.query.filter_by(stock_id=stock.id).first()
+    
+    prices = load_price_columns(stock)
+    dates, closes = prices['date'], prices['close']
+    if (summary is None or summary.fingerprint != fingerprint or summary.last_date is None
+            or summary.up_days is None):
+        if summary is None:
+            summary = CorrelationSummary(stock_id=stock.id)
+            db.session.add(summary)
+        summary.fingerprint = fingerprint
+        summary.price_count = summary.correct_predictions = summary.total_days = 0
+        summary.up_days = summary.up_calls = 0
+        summary.last_date = summary.last_close = None
+        previous_close = None
+    else:
+        first = np.searchsorted(dates, np.datetime64(summary.last_date, 'D'), side='right')
+        dates, closes = dates[first:], closes[first:]
+        previous_close = np.nan if summary.last_close is None else summary.last_close
+    
+    if len(dates):
+        correct, days, up_days, up_calls = kp_engine.correlation_counts(
+            (dates, closes), wealth_mask, previous_close
+        )
+        summary.price_count += len(dates)
+        summary.correct_predictions += correct
+        summary.total_days += days
+        summary.up_days += up_days
+        summary.up_calls += up_calls
+        summary.last_date = dates[-1].astype(object)
+        summary.last_close = None if np.isnan(closes[-1]) else float(closes[-1])
+        summary.updated_at = datetime.utcnow()
+    db.session.commit()
+    return summary
+
+def load_price_window(stock, window=10, start=None, end=None):
+    """(dates, closes) for the reported days plus the bar before them"""
+    prices = load_price_columns(stock)
+    dates, closes = prices['date'], prices['close']
+    if start is None and end is None:
+        first, last = max(len(dates) - window - 1, 0), len(dates)
+    else:
+        first = (max(np.searchsorted(dates, np.datetime64(start, 'D')) - 1, 0)
+                 if start is not None else 0)
+        last = (np.searchsorted(dates, np.datetime64(end, 'D'), side='right')
+                if end is not None else len(dates))
+    return dates[first:last], closes[first:last]
+
+def correlation_report(stock_id, data):
+    """Correlation analysis for a stock; returns (payload, status)"""
+    print(f"Starting correlation analysis for stock {stock_id}")  # Debug
+    
+    stock = Stock.query.get_or_404(stock_id)
+    kp_chart = KPBirthChart.query.filter_by(stock_id=stock_id).first()
+    
+    if not kp_chart:
+        return {'error': 'KP chart not found. Please add the stock first.'}, 404
+    
+    window = int(data.get('window', 10))
+    start = datetime.strptime(data['start'], '%Y-%m-%d').date() if data.get('start') else None
+    end = datetime.strptime(data['end'], '%Y-%m-%d').date() if data.get('end') else None
+    
+    key = analysis_cache_key('correlation', stock, window, start, end)
+    cached = analysis_cache.get(key)
+    if cached is not None:
+        return cached, 200
+    
+    masks = chart_significator_masks(kp_chart)
+    summary = update_correlation_summary(stock, masks)
+    
+    print(f"Found {summary.price_count} price records")  # Debug
+    
+    if summary.price_count < 10:
+        return {
+            'error': f'Insufficient price data. Found {summary.price_count} records, but need at least 10 days of data. Generate demo prices first.'
+        }, 400
+    
+    # Prepare birth chart data
+    birth_chart_data = {
+        'stock_id': stock_id,
+        'significator_masks': masks
+    }
+    
+    # Analyze correlation: totals from the summary, daily rows for the window only
+    correlation_result = kp_engine.analyze_correlation(
+        load_price_window(stock, window, start, end),
+        birth_chart_data, window=window, start=start, end=end,
+        totals=(summary.correct_predictions, summary.total_days, summary.up_days, summary.up_calls)
+    )
+    
+    print(f"Correlation result: {correlation_result}")  # Debug
+    
+    if 'error' not in correlation_result:
+        analysis_cache.put(key, correlation_result)
+    return correlation_result, 200
+
 @app.route('/api/stocks/<int:stock_id>/correlation', methods=['POST'])
 def analyze_correlation(stock_id):
     try:
-        print(f"Starting correlation analysis for stock {stock_id}")  # Debug
-        
-        stock = Stock.query.get_or_404(stock_id)
-        kp_chart = KPBirthChart.query.filter_by(stock_id=stock_id).first()
-        
-        if not kp_chart:
-            return jsonify({'error': 'KP chart not found. Please add the stock first.'}), 404
-        
-        # Get price data
-        prices = StockPrice.query.filter_by(stock_id=stock_id).order_by(StockPrice.date.asc()).all()
-        
-        print(f"Found {len(prices)} price records")  # Debug
-        
-        if not prices or len(prices) < 10:
-            return jsonify({
-                'error': f'Insufficient price data. Found {len(prices)} records, but need at least 10 days of data. Generate demo prices first.'
-            }), 400
-        
-        # Prepare birth chart data
-        birth_chart_data = {
-            'house_significators': kp_chart.house_significators,
-            'planet_positions': kp_chart.planet_positions
-        }
-        
-        # Analyze correlation
-        correlation_result = kp_engine.analyze_correlation(prices, birth_chart_data)
-        
-        print(f"Correlation result: {correlation_result}")  # Debug
-        
-        return jsonify(correlation_result)
-        
+        data = dict(request.get_json(silent=True) or {}, stock_id=stock_id)
+        background = unsummarized_bar_count(stock_id) > MAX_INLINE_PRICE_BARS
+        return run_or_enqueue('correlation', data, background,
+                              lambda params: correlation_report(stock_id, params))
+    except QueueFull as e:
+        return jsonify({'error': f'Job queue is full: {e}'}), 503
     except Exception as e:
         print(f"Error in correlation route: {e}")  # Debug
         return jsonify({'error': f'Server error: {str(e)}'}), 500
 
+def walk_forward_report(stock_id, data):
+    """Rolling-window accuracy for a stock; returns (payload, status)"""
+    windows = [int(window) for window in data.get('windows', [60, 120, 250])]
+    step = int(data.get('step', 20))
+    if not windows or len(windows) > 10 or min(windows) < 2 or step < 1:
+        return {'error': 'Give 1-10 windows of at least 2 days and a step of at least 1'}, 400
+    
+    stock = Stock.query.get_or_404(stock_id)
+    kp_chart = KPBirthChart.query.filter_by(stock_id=stock_id).first()
+    if not kp_chart:
+        return {'error': 'KP chart not found. Please add the stock first.'}, 404
+    
+    prices = load_price_columns(stock)
+    if len(prices['date']) < 10:
+        return {'error': f"Insufficient price data. Found {len(prices['date'])} records, but need at least 10 days of data."}, 400
+    
+    masks = chart_significator_masks(kp_chart)
+    return {
+        'symbol': stock.symbol,
+        'step': step,
+        'windows': kp_engine.walk_forward(
+            (prices['date'], prices['close']), int(masks[1] | masks[10]), windows, step
+        )
+    }, 200
+
+@app.route('/api/stocks/<int:stock_id>/walk-forward', methods=['POST'])
+def walk_forward(stock_id):
+    try:
+        return respond(*walk_forward_report(stock_id, request.get_json(silent=True) or {}))
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/stocks/<int:stock_id>/predict', methods=['POST'])
 def predict_movement(stock_id):
     try:
@@ -1463,9 +1983,15 @@ def predict_movement(stock_id):
         if not kp_chart:
             return jsonify({'error': 'KP chart not found'}), 404
         
+        key = analysis_cache_key('predict', stock, prediction_date or datetime.utcnow().strftime('%Y-%m-%d'))
+        prediction = analysis_cache.get(key)
+        if prediction is not None:
+            return jsonify(prediction)
+        
         # Prepare birth chart data
         birth_chart_data = {
-            'house_significators': kp_chart.house_significators
+            'stock_id': stock_id,
+            'significator_masks': chart_significator_masks(kp_chart)
         }
         
         # Get prediction
@@ -1473,12 +1999,346 @@ def predict_movement(stock_id):
         
         print(f"Prediction result: {prediction}")  # Debug
         
+        if 'error' not in prediction:
+            analysis_cache.put(key, prediction)
         return jsonify(prediction)
         
     except Exception as e:
         print(f"Error in prediction route: {e}")  # Debug
         return jsonify({'error': f'Prediction failed: {str(e)}'}), 500
 
+@app.route('/api/stocks/<int:stock_id>/predict-range')
+def predict_range(stock_id):
+    try:
+        start = datetime.strptime(request.args.get('start', datetime.utcnow().strftime('%Y-%m-%d')), '%Y-%m-%d').date()
+        end = (datetime.strptime(request.args['end'], '%Y-%m-%d').date() if 'end' in request.args
+               else start + timedelta(days=364))
+        if end < start:
+            return jsonify({'error': 'end must not be before start'}), 400
+        if (end - start).days >= MAX_PREDICTION_DAYS:
+            return jsonify({'error': f'Prediction range is limited to {MAX_PREDICTION_DAYS} days'}), 400
+        
+        stock = Stock.query.get_or_404(stock_id)
+        kp_chart = KPBirthChart.query.filter_by(stock_id=stock_id).first()
+        if not kp_chart:
+            return jsonify({'error': 'KP chart not found'}), 404
+        
+        birth_chart_data = {
+            'stock_id': stock_id,
+            'significator_masks': chart_significator_masks(kp_chart)
+        }
+        result = kp_engine.predict_range(birth_chart_data, start, end)
+        result['symbol'] = stock.symbol
+        return jsonify(result)
+    except Exception as e:
+        return jsonify({'error': f'Prediction failed: {str(e)}'}), 500
+
+@app.route('/api/transits/events')
+def get_transit_events():
+    try:
+        start = datetime.strptime(request.args.get('start', datetime.utcnow().strftime('%Y-%m-%d')), '%Y-%m-%d')
+        end = (datetime.strptime(request.args['end'], '%Y-%m-%d') if 'end' in request.args
+               else start + timedelta(days=30))
+        if end <= start:
+            return jsonify({'error': 'end must be after start'}), 400
+        
+        start_jd, end_jd = julian_days_from_datetimes([start, end]).tolist()
+        
+        if transit_event_index is not None and transit_event_index.covers(start_jd, end_jd):
+            index = transit_event_index
+        else:
+            if (end - start).days > MAX_TRANSIT_EVENT_DAYS:
+                return jsonify({
+                    'error': f'Range outside the prebuilt event index is limited to {MAX_TRANSIT_EVENT_DAYS} days'
+                }), 400
+            index = transit_event_cache.get((start_jd, end_jd))
+            if index is None:
+                index = transit_event_engine.find_events(start_jd, end_jd)
+                transit_event_cache.put((start_jd, end_jd), index)
+        
+        events = index.between(start_jd, end_jd,
+                               bodies=request.args.getlist('body'),
+                               kinds=request.args.getlist('kind'))
+        return jsonify({
+            'start': start.date().isoformat(),
+            'end': end.date().isoformat(),
+            'count': len(events),
+            'events': index.to_dicts(events)
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def analysis_processes(data):
+    """Processes requested for a backtest, capped by ANALYSIS_PROCESSES"""
+    return max(1, min(int(data.get('processes') or ANALYSIS_PROCESSES), ANALYSIS_PROCESSES))
+
+def load_backtester(data):
+    """(stock_ids, symbols, dates, Backtester) for the stocks and dates selected
+    in a request body, or None when there are no prices"""
+    # Natal masks from the in-memory store, prices from the columnar price store
+    _, stock_ids, symbols, masks = load_significator_store().snapshot()
+    if data.get('stock_ids'):
+        selected = np.isin(stock_ids, data['stock_ids'])
+        stock_ids, masks = stock_ids[selected], masks[selected]
+        symbols = [symbol for symbol, keep in zip(symbols, selected.tolist()) if keep]
+    
+    start = np.datetime64(data['start'], 'D') if data.get('start') else None
+    end = np.datetime64(data['end'], 'D') if data.get('end') else None
+    stocks = {stock.id: stock for stock in Stock.query.filter(Stock.id.in_(stock_ids.tolist()))}
+    series = []
+    for stock_id in stock_ids.tolist():
+        if stock_id not in stocks:
+            continue
+        prices = load_price_columns(stocks[stock_id])
+        dates = prices['date']
+        first = np.searchsorted(dates, start) if start is not None else 0
+        last = np.searchsorted(dates, end, side='right') if end is not None else len(dates)
+        series.append((stock_id, dates[first:last], prices['close'][first:last]))
+    if not any(len(dates) for _, dates, _ in series):
+        return None
+    
+    dates, closes, present = backtest.series_price_matrix(series, stock_ids)
+    star_lords, sub_lords = transit_scores.transit_lords(kp_engine.chart_calculator, dates[1:])
+    backtester = backtest.Backtester(closes, present, masks[:, 1] | masks[:, 10], star_lords, sub_lords)
+    return stock_ids, symbols, dates, backtester
+
+def requested_weight_sets(data):
+    """(weight_sets, random_sets, error) from a request body; checked before any sets are generated"""
+    weight_sets = data.get('weight_sets') or []
+    random_sets = data.get('random_sets') or 0
+    if not isinstance(weight_sets, list):
+        return [], 0, 'weight_sets must be a list of planet weight objects'
+    if isinstance(random_sets, bool) or not isinstance(random_sets, int) or random_sets < 0:
+        return [], 0, 'random_sets must be a non-negative integer'
+    if 1 + len(weight_sets) + random_sets > MAX_BACKTEST_WEIGHT_SETS:
+        return [], 0, f'At most {MAX_BACKTEST_WEIGHT_SETS} weight sets per backtest'
+    return weight_sets, random_sets, None
+
+def backtest_report(data, progress=None):
+    """Weight-set sweep for a request body; returns (payload, status)"""
+    weight_sets, random_sets, error = requested_weight_sets(data)
+    if error:
+        return {'error': error}, 400
+    
+    weight_sets = [kp_engine.planet_weights] + weight_sets
+    if random_sets:
+        weight_sets += backtest.random_weight_sets(random_sets, data.get('seed')).tolist()
+    
+    started = datetime.utcnow()
+    loaded = load_backtester(data)
+    if loaded is None:
+        return {'error': 'No price data for the selected stocks'}, 400
+    stock_ids, _, dates, backtester = loaded
+    results = backtester.run(weight_sets, processes=analysis_processes(data), progress=progress)
+    
+    limit = int(data.get('limit', 20))
+    return {
+        'stocks': len(stock_ids),
+        'days': len(dates),
+        'evaluated': len(results),
+        'elapsed_seconds': round((datetime.utcnow() - started).total_seconds(), 3),
+        'baseline': results[0],
+        'results': sorted(results, key=lambda result: -result['accuracy'])[:limit]
+    }, 200
+
+@app.route('/api/backtest', methods=['POST'])
+def run_backtest():
+    try:
+        data = request.get_json(silent=True) or {}
+        weight_sets, random_sets, error = requested_weight_sets(data)
+        if error:
+            return jsonify({'error': error}), 400
+        bars = price_bar_count(data.get('stock_ids'))
+        background = (bars > MAX_INLINE_PRICE_BARS
+                      or (1 + len(weight_sets) + random_sets) * bars > MAX_INLINE_BACKTEST_CELLS)
+        return run_or_enqueue('backtest', data, background, backtest_report)
+    except QueueFull as e:
+        return jsonify({'error': f'Job queue is full: {e}'}), 503
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def significance_resamples(data):
+    return min(max(int(data.get('resamples', 2000)), 100), 100000)
+
+def significance_report(data):
+    """Significance tests across stocks for a request body; returns (payload, status)"""
+    resamples = significance_resamples(data)
+    
+    started = datetime.utcnow()
+    loaded = load_backtester(data)
+    if loaded is None:
+        return {'error': 'No price data for the selected stocks'}, 400
+    stock_ids, symbols, dates, backtester = loaded
+    
+    # Counts for the current weights, then all stocks' tests in one batch
+    hits, up_calls, _ = backtest.evaluate_weights(
+        backtester.arrays, backtest.weight_matrix([kp_engine.planet_weights])
+    )
+    actual = backtester.arrays['actual']
+    days = (actual != 0).sum(axis=1)
+    up_days = (actual == 1).sum(axis=1)
+    tests = significance.significance(hits[0], days, up_days, up_calls[0], resamples=resamples,
+                                      seed=data.get('seed', 0), processes=analysis_processes(data))
+    
+    results = []
+    for index in np.argsort(tests['p_value'], kind='stable').tolist():
+        if not days[index]:
+            continue
+        results.append({
+            'stock_id': int(stock_ids[index]),
+            'symbol': symbols[index],
+            'accuracy': round(float(hits[0, index]) / int(days[index]) * 100, 2),
+            'total_days_analyzed': int(days[index]),
+            'p_value': round(float(tests['p_value'][index]), 4),
+            'confidence_interval': [float(tests['ci_low'][index]), float(tests['ci_high'][index])]
+        })
+    
+    return {
+        'resamples': resamples,
+        'days': len(dates),
+        'significant_at_5pct': sum(1 for result in results if result['p_value'] < 0.05),
+        'elapsed_seconds': round((datetime.utcnow() - started).total_seconds(), 3),
+        'results': results
+    }, 200
+
+@app.route('/api/significance', methods=['POST'])
+def universe_significance():
+    try:
+        data = request.get_json(silent=True) or {}
+        stocks = len(data['stock_ids']) if data.get('stock_ids') else Stock.query.count()
+        background = (price_bar_count(data.get('stock_ids')) > MAX_INLINE_PRICE_BARS
+                      or significance_resamples(data) * stocks > MAX_INLINE_SIGNIFICANCE_DRAWS)
+        return run_or_enqueue('significance', data, background, significance_report)
+    except QueueFull as e:
+        return jsonify({'error': f'Job queue is full: {e}'}), 503
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/screener')
+def screen_stocks():
+    try:
+        date = datetime.strptime(request.args.get('date', datetime.utcnow().strftime('%Y-%m-%d')), '%Y-%m-%d').date()
+        page = max(request.args.get('page', 1, type=int), 1)
+        per_page = min(max(request.args.get('per_page', 50, type=int), 1), MAX_SCREENER_PAGE_SIZE)
+        
+        version, stock_ids, symbols, masks = load_significator_store().snapshot()
+        
+        # Rank every stock once per (date, store version); pages slice the ranking
+        key = (date, version)
+        ranking = screener_cache.get(key)
+        if ranking is None:
+            natal, transit = kp_engine.screen_scores(masks, date)
+            total = natal + transit
+            order = np.lexsort((stock_ids, -total))
+            ranking = (order, natal, transit, total)
+            screener_cache.put(key, ranking)
+        order, natal, transit, total = ranking
+        
+        selected = order[(page - 1) * per_page:page * per_page]
+        predictions, confidences = kp_engine.prediction_labels(total[selected])
+        results = []
+        for rank, index, prediction, confidence in zip(
+                range((page - 1) * per_page + 1, len(order) + 1), selected.tolist(),
+                predictions.tolist(), confidences.tolist()):
+            results.append({
+                'rank': rank,
+                'stock_id': int(stock_ids[index]),
+                'symbol': symbols[index],
+                'score': round(float(total[index]), 2),
+                'natal_score': round(float(natal[index]), 2),
+                'transit_score': round(float(transit[index]), 2),
+                'prediction': prediction,
+                'confidence': confidence,
+                'key_factors': decode_mask(masks[index, 1]) + decode_mask(masks[index, 10])
+            })
+        
+        return jsonify({
+            'date': date.isoformat(),
+            'total': len(order),
+            'page': page,
+            'per_page': per_page,
+            'results': results
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/ruling-planets')
+def get_ruling_planets():
+    try:
+        lat = request.args.get('lat', 19.0750, type=float)
+        lon = request.args.get('lon', 72.8777, type=float)
+        utc_offset = request.args.get('utc_offset_minutes', 330, type=int)
+        
+        key = (lat, lon, utc_offset)
+        service = ruling_planet_services.get(key)
+        if service is None:
+            service = RulingPlanetsService(kp_engine.chart_calculator, lat, lon, utc_offset)
+            ruling_planet_services.put(key, service)
+        
+        return jsonify(service.get())
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+job_queue.register('correlation', lambda params, progress: correlation_report(params['stock_id'], params))
+job_queue.register('walk_forward', lambda params, progress: walk_forward_report(params['stock_id'], params))
+job_queue.register('backtest', backtest_report)
+job_queue.register('significance', lambda params, progress: significance_report(params))
+job_queue.register('generate_prices', lambda params, progress: generate_price_history(params['stock_id'], params))
+job_queue.register('charts', generate_charts)
+
+@app.route('/api/jobs', methods=['POST'])
+def submit_job():
+    try:
+        data = request.get_json(silent=True) or {}
+        kind = data.get('kind')
+        if kind not in job_queue.handlers:
+            return jsonify({'error': f'Unknown job kind {kind!r}', 'kinds': sorted(job_queue.handlers)}), 400
+        
+        return job_response(job_queue.submit(kind, data.get('params') or {}))
+    except QueueFull as e:
+        return jsonify({'error': f'Job queue is full: {e}'}), 503
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/jobs')
+def list_jobs():
+    try:
+        query = Job.query
+        if request.args.get('status'):
+            query = query.filter_by(status=request.args['status'])
+        if request.args.get('kind'):
+            query = query.filter_by(kind=request.args['kind'])
+        limit = min(request.args.get('limit', 50, type=int), 500)
+        jobs = query.order_by(Job.created_at.desc()).limit(limit).all()
+        return jsonify([job.to_dict() for job in jobs])
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/jobs/<job_id>')
+def get_job(job_id):
+    try:
+        job = db.session.get(Job, job_id)
+        if job is None:
+            return jsonify({'error': 'Job not found'}), 404
+        return jsonify(job.to_dict())
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/jobs/<job_id>/result')
+def get_job_result(job_id):
+    try:
+        job = db.session.get(Job, job_id)
+        if job is None:
+            return jsonify({'error': 'Job not found'}), 404
+        if job.status == 'succeeded':
+            return jsonify(job.result)
+        if job.status == 'failed':
+            return jsonify({'error': job.error, 'status': job.status}), 409
+        return job_response(job)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/stats')
 def get_stats():
     try:
@@ -1487,7 +2347,9 @@ def get_stats():
         
         return jsonify({
             'total_stocks': total_stocks,
-            'total_charts': total_charts
+            'total_charts': total_charts,
+            'chart_cache': chart_cache.stats(),
+            'analysis_cache': analysis_cache.stats()
         })
     except Exception as e:
         return jsonify({'error': str(e)}), 500
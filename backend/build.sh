@@ -6,9 +6,13 @@ echo "🚀 Starting build process for Stock Astrology App..."
 echo "📦 Installing Python dependencies..."
 pip install -r requirements.txt
 
-# Download Swiss Ephemeris data
-echo "📥 Downloading Swiss Ephemeris data..."
-python -c "import swisseph; swisseph.download_ephe()"
+# Build the precomputed KP ephemeris table (no downloads needed)
+echo "📥 Building KP ephemeris table..."
+python build_ephemeris_table.py
+
+# Build the transit event index from the table
+echo "🪐 Building transit event index..."
+python build_transit_events.py
 
 # Initialize database
 echo "🗄️ Initializing database..."
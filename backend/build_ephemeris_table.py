@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Script to build the precomputed KP ephemeris table (1900-2100)
+
+Usage:
+    python build_ephemeris_table.py [path]          # build the table
+    python build_ephemeris_table.py --check [path]  # measure interpolation error
+"""
+import sys
+
+import numpy as np
+import swisseph as swe
+
+from kp_astrology.chart_calculator import KPChartCalculator
+from kp_astrology.ephemeris_table import (
+    DEFAULT_TABLE_PATH, EphemerisTable, build_ephemeris_table
+)
+
+
+def check_table(path, samples=20000, seed=0):
+    """Compare interpolated positions with swe.calc_ut at random instants (percentiles and maxima)"""
+    table = EphemerisTable(path)
+    calculator = KPChartCalculator()
+    rng = np.random.default_rng(seed)
+    jds = rng.uniform(table.start_jd, table.end_jd - 1, samples)
+
+    interpolated = table.interpolate(jds)
+    swe.set_sid_mode(calculator.kp_ayanamsha)
+    for column, (planet_code, planet_name) in enumerate(calculator.planet_map.items()):
+        exact = np.array([swe.calc_ut(jd, planet_code, calculator.planet_flags)[0] for jd in jds])
+        lon_error = np.abs((interpolated[:, column, 0] - exact[:, 0] + 180) % 360 - 180)
+        lat_error = np.abs(interpolated[:, column, 1] - exact[:, 1])
+        p99, p999 = np.percentile(lon_error, [99, 99.9]) * 3600
+        print(f"{planet_name:8s} longitude error p99 {p99:.4f}\"  p99.9 {p999:.4f}\"  "
+              f"max {lon_error.max() * 3600:.4f}\"  max latitude error {lat_error.max() * 3600:.4f}\"")
+
+
+def main():
+    args = sys.argv[1:]
+    if args and args[0] == '--check':
+        check_table(args[1] if len(args) > 1 else DEFAULT_TABLE_PATH)
+        return
+
+    path = args[0] if args else DEFAULT_TABLE_PATH
+    print(f"📦 Building KP ephemeris table at {path}...")
+    try:
+        build_ephemeris_table(path, KPChartCalculator())
+        print("✅ Ephemeris table built successfully!")
+    except Exception as e:
+        print(f"❌ Failed to build ephemeris table: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
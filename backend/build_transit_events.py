@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""
+Script to build the persisted KP transit event index
+
+Usage:
+    python build_transit_events.py [start_year] [end_year] [path]
+"""
+import sys
+
+import swisseph as swe
+
+from kp_astrology.chart_calculator import KPChartCalculator
+from kp_astrology.ephemeris_table import open_default_table
+from kp_astrology.transit_events import DEFAULT_INDEX_PATH, TransitEventEngine
+
+
+def main():
+    args = sys.argv[1:]
+    start_year = int(args[0]) if len(args) > 0 else 1900
+    end_year = int(args[1]) if len(args) > 1 else 2100
+    path = args[2] if len(args) > 2 else DEFAULT_INDEX_PATH
+
+    print(f"📦 Building transit events {start_year}-{end_year} at {path}...")
+    try:
+        engine = TransitEventEngine(KPChartCalculator(ephemeris_table=open_default_table()))
+        index = engine.find_events(swe.julday(start_year, 1, 1, 0.0),
+                                   swe.julday(end_year + 1, 1, 1, 0.0))
+        index.save(path)
+        print(f"✅ {len(index.events)} transit events saved!")
+    except Exception as e:
+        print(f"❌ Failed to build transit events: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Columnar per-stock price cache for analytics reads.
+
+Each stock's history is kept as one .npy file per column (date, open,
+high, low, close, volume) in a directory named after the stock id and a
+version string that changes whenever its prices are replaced, so analyses
+memory-map only the columns they need instead of hydrating ORM rows. A
+new version gets a new directory: readers of an old version keep their
+mapped files, and a missing directory just means the columns are rebuilt
+from the database.
+"""
+import os
+import shutil
+import uuid
+
+import numpy as np
+
+COLUMNS = ('date', 'open', 'high', 'low', 'close', 'volume')
+DTYPES = {
+    'date': np.dtype('datetime64[D]'),
+    'open': np.dtype('<f8'),
+    'high': np.dtype('<f8'),
+    'low': np.dtype('<f8'),
+    'close': np.dtype('<f8'),
+    'volume': np.dtype('<i8'),
+}
+
+DEFAULT_STORE_PATH = os.environ.get(
+    'PRICE_STORE_DIR',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'price_store')
+)
+
+
+def price_columns(rows):
+    """Column arrays from (date, open, high, low, close, volume) rows sorted by date"""
+    count = len(rows)
+    columns = {
+        'date': np.array([row[0] for row in rows], dtype=DTYPES['date']).reshape(count)
+    }
+    for index, name in enumerate(COLUMNS[1:5], start=1):
+        columns[name] = np.fromiter((np.nan if row[index] is None else row[index] for row in rows),
+                                    dtype=DTYPES[name], count=count)
+    columns['volume'] = np.fromiter((row[5] or 0 for row in rows), dtype=DTYPES['volume'], count=count)
+    return columns
+
+
+class PriceStore:
+    def __init__(self, root=DEFAULT_STORE_PATH):
+        self.root = root
+
+    def path(self, stock_id, version):
+        return os.path.join(self.root, f'{int(stock_id)}-{version}')
+
+    def read(self, stock_id, version, columns=COLUMNS):
+        """Read-only memory-mapped columns, or None if this version is not stored"""
+        path = self.path(stock_id, version)
+        try:
+            return {name: _load(os.path.join(path, f'{name}.npy')) for name in columns}
+        except FileNotFoundError:
+            return None
+
+    def write(self, stock_id, version, columns):
+        """Store a version's columns and drop the stock's older versions"""
+        path = self.path(stock_id, version)
+        tmp_path = os.path.join(self.root, f'.{uuid.uuid4().hex}.tmp')
+        os.makedirs(tmp_path)
+        try:
+            for name in COLUMNS:
+                np.save(os.path.join(tmp_path, f'{name}.npy'),
+                        np.asarray(columns[name], dtype=DTYPES[name]))
+            os.rename(tmp_path, path)
+        except OSError:
+            # Another process stored the same version first
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            if not os.path.isdir(path):
+                raise
+        self.remove(stock_id, older_than=version)
+
+    def remove(self, stock_id, older_than=None):
+        """Delete a stock's stored versions (only those older than older_than if given)"""
+        if not os.path.isdir(self.root):
+            return
+        prefix = f'{int(stock_id)}-'
+        newest = _version_key(older_than) if older_than is not None else None
+        for name in os.listdir(self.root):
+            if not name.startswith(prefix):
+                continue
+            # A slower writer of an old version must not delete a newer one
+            if newest is not None and _version_key(name[len(prefix):]) >= newest:
+                continue
+            shutil.rmtree(os.path.join(self.root, name), ignore_errors=True)
+
+
+def _version_key(version):
+    """Sortable key of a '<created>-<price_version>' version; unparseable ones sort first"""
+    try:
+        return (1,) + tuple(int(part) for part in str(version).split('-'))
+    except ValueError:
+        return (0,)
+
+
+def _load(path):
+    array = np.load(path, mmap_mode='r')
+    # Zero-length arrays come back as plain arrays; keep them read-only too
+    array.flags.writeable = False
+    return array
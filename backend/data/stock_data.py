@@ -1,7 +1,62 @@
-import yfinance as yf
-import pandas as pd
 from datetime import datetime, timedelta
-from models.stock_models import db, StockPrice
+from sqlalchemy import func
+from sqlalchemy.dialects import postgresql, sqlite
+from models.stock_models import db, CorrelationSummary, Stock, StockPrice
+
+# Rows per INSERT (x 8 columns stays under SQLite's 32766 bound parameters)
+INSERT_CHUNK_SIZE = 2000
+
+def history_insert_columns(stock_id, hist_data):
+    """Insert columns for a yfinance history frame; rows without a close are dropped"""
+    import pandas as pd  # installed with yfinance
+    
+    frame = hist_data[hist_data['Close'].notna()]
+    times = frame.index
+    if getattr(times, 'tz', None) is not None:
+        # The trading date on the exchange's own calendar
+        times = times.tz_localize(None)
+    return {
+        'stock_id': [stock_id] * len(frame),
+        'date': [time.date() for time in pd.DatetimeIndex(times).to_pydatetime()],
+        'open_price': frame['Open'].fillna(0).astype(float).tolist(),
+        'high_price': frame['High'].fillna(0).astype(float).tolist(),
+        'low_price': frame['Low'].fillna(0).astype(float).tolist(),
+        'close_price': frame['Close'].astype(float).tolist(),
+        'volume': frame['Volume'].fillna(0).astype('int64').tolist(),
+        'created_at': [datetime.utcnow()] * len(frame)
+    }
+
+def insert_prices(rows):
+    """Insert a chunk of one stock's row dicts, skipping dates already stored; returns the inserted dates"""
+    if not rows:
+        return []
+    table = StockPrice.__table__
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'postgresql':
+        statement = postgresql.insert(table).values(rows).on_conflict_do_nothing(
+            index_elements=['stock_id', 'date']
+        ).returning(table.c.date)
+        return [date for (date,) in db.session.execute(statement)]
+    
+    # Drop the rows already stored: one range query on the (stock_id, date) index per chunk
+    dates = [row['date'] for row in rows]
+    existing = {
+        date for (date,) in db.session.query(StockPrice.date).filter(
+            StockPrice.stock_id == rows[0]['stock_id'],
+            StockPrice.date.between(min(dates), max(dates))
+        )
+    }
+    rows = [row for row in rows if row['date'] not in existing]
+    if not rows:
+        return []
+    if dialect == 'sqlite':
+        # Still guard against a concurrent insert of the same rows
+        statement = sqlite.insert(table).on_conflict_do_nothing(index_elements=['stock_id', 'date'])
+    else:
+        statement = table.insert()
+    db.session.execute(statement, rows)
+    return [row['date'] for row in rows]
+
 
 class StockDataManager:
     def __init__(self):
@@ -10,6 +65,9 @@ class StockDataManager:
     def fetch_stock_data(self, symbol, period="2y"):
         """Fetch stock data from Yahoo Finance"""
         try:
+            # Optional dependency, only needed to fetch from Yahoo Finance
+            import yfinance as yf
+            
             yf_symbol = f"{symbol}.NS"
             stock = yf.Ticker(yf_symbol)
             hist_data = stock.history(period=period)
@@ -19,26 +77,36 @@ class StockDataManager:
             return None
     
     def store_stock_prices(self, stock_id, hist_data):
-        """Store historical prices in database"""
+        """Store historical prices in database, skipping rows that already exist"""
+        try:
+            columns = history_insert_columns(stock_id, hist_data)
+        except Exception as e:
+            print(f"Error storing prices: {e}")
+            return False
+        return self.store_price_columns(stock_id, columns)
+    
+    def store_price_columns(self, stock_id, columns):
+        """Store history_insert_columns()-style columns for one stock, skipping stored dates"""
         try:
-            for date, row in hist_data.iterrows():
-                existing = StockPrice.query.filter_by(
-                    stock_id=stock_id, 
-                    time=date
-                ).first()
-                
-                if not existing and not pd.isna(row['Close']):
-                    stock_price = StockPrice(
-                        stock_id=stock_id,
-                        time=date,
-                        open=float(row['Open']) if not pd.isna(row['Open']) else 0,
-                        high=float(row['High']) if not pd.isna(row['High']) else 0,
-                        low=float(row['Low']) if not pd.isna(row['Low']) else 0,
-                        close=float(row['Close']) if not pd.isna(row['Close']) else 0,
-                        volume=int(row['Volume']) if pd.notna(row['Volume']) else 0
-                    )
-                    db.session.add(stock_price)
+            names = list(columns)
+            values = list(zip(*columns.values()))
+            inserted = []
+            for first in range(0, len(values), INSERT_CHUNK_SIZE):
+                rows = [dict(zip(names, row)) for row in values[first:first + INSERT_CHUNK_SIZE]]
+                inserted += insert_prices(rows)
             
+            if inserted:
+                # New price version for the analysis caches and the columnar store
+                Stock.query.filter_by(id=stock_id).update(
+                    {Stock.price_version: func.coalesce(Stock.price_version, 0) + 1},
+                    synchronize_session=False
+                )
+                # Correlation summaries only fold bars after their last date forward,
+                # so one that a new bar lands inside is rebuilt
+                CorrelationSummary.query.filter(
+                    CorrelationSummary.stock_id == stock_id,
+                    CorrelationSummary.last_date >= min(inserted)
+                ).delete(synchronize_session=False)
             db.session.commit()
             return True
         except Exception as e:
@@ -51,15 +119,15 @@ class StockDataManager:
         try:
             prices = StockPrice.query.filter(
                 StockPrice.stock_id == stock_id,
-                StockPrice.time >= start_date,
-                StockPrice.time <= end_date
-            ).order_by(StockPrice.time).all()
+                StockPrice.date >= start_date,
+                StockPrice.date <= end_date
+            ).order_by(StockPrice.date).all()
             
             price_data = []
             for price in prices:
                 price_data.append({
-                    'time': price.time,
-                    'close': price.close,
+                    'date': price.date,
+                    'close': price.close_price,
                     'volume': price.volume
                 })
             
@@ -1,16 +1,54 @@
 import os
+from sqlalchemy import event
 from models.stock_models import db
 
+def _env_int(name, default):
+    value = os.environ.get(name)
+    return int(value) if value not in (None, '') else default
+
+def _env_bool(name, default):
+    value = os.environ.get(name)
+    if value in (None, ''):
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+def engine_options(database_url):
+    """SQLAlchemy engine options from DB_* environment variables"""
+    if database_url.startswith('sqlite'):
+        # Wait for the write lock instead of failing with "database is locked"
+        return {
+            'connect_args': {'timeout': _env_int('SQLITE_BUSY_TIMEOUT', 30)}
+        }
+    return {
+        'pool_size': _env_int('DB_POOL_SIZE', 5),
+        'max_overflow': _env_int('DB_MAX_OVERFLOW', 10),
+        'pool_timeout': _env_int('DB_POOL_TIMEOUT', 30),
+        'pool_recycle': _env_int('DB_POOL_RECYCLE', 1800),
+        'pool_pre_ping': _env_bool('DB_POOL_PRE_PING', True)
+    }
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """WAL lets readers run alongside the (single) writer across gunicorn workers"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA journal_mode={os.environ.get('SQLITE_JOURNAL_MODE', 'WAL')}")
+    cursor.execute(f"PRAGMA synchronous={os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL')}")
+    cursor.close()
+
 def init_db(app):
     """Initialize database with app"""
     database_url = os.environ.get('DATABASE_URL')
-    
+
     if database_url:
         if database_url.startswith("postgres://"):
             database_url = database_url.replace("postgres://", "postgresql://", 1)
-        app.config['SQLALCHEMY_DATABASE_URI'] = database_url
     else:
-        app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///stock_astrology.db'
-    
+        database_url = 'sqlite:///stocks.db'
+
+    app.config['SQLALCHEMY_DATABASE_URI'] = database_url
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(database_url)
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
     db.init_app(app)
+
+    if database_url.startswith('sqlite'):
+        with app.app_context():
+            event.listen(db.engine, 'connect', _set_sqlite_pragmas)
@@ -0,0 +1,184 @@
+"""
+Background jobs for long-running analyses.
+
+Request handlers only record a job and hand it to a bounded thread pool,
+so gunicorn workers return immediately. Every state change (queued,
+running with progress, succeeded with its result, failed with the error)
+is written to the job table, so any web worker can answer status polls.
+
+Job state is written on its own connection, never through the session the
+handler uses, so a handler's writes commit (or roll back) as one unit.
+While a process holds jobs it refreshes their heartbeat; jobs whose
+heartbeat is older than LEASE_TIMEOUT belonged to a process that died and
+are marked failed by whichever process notices first.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+import os
+import socket
+import threading
+import time
+import uuid
+
+# Progress is written at most this often (seconds) unless the job finishes
+PROGRESS_INTERVAL = 0.5
+# Seconds between heartbeats, and the age after which a job is orphaned
+HEARTBEAT_INTERVAL = 30
+LEASE_TIMEOUT = 4 * HEARTBEAT_INTERVAL
+
+# Distinguishes this process from an earlier one that had the same pid
+_BOOT_ID = uuid.uuid4().hex[:12]
+
+
+class QueueFull(Exception):
+    pass
+
+
+def _owner():
+    """host:pid:boot id of the process whose pool runs a job"""
+    return f'{socket.gethostname()}:{os.getpid()}:{_BOOT_ID}'
+
+
+class JobQueue:
+    def __init__(self, app, db, job_model, max_workers=2, max_pending=100):
+        self.app = app
+        self.db = db
+        self.job_model = job_model
+        self.max_pending = max_pending
+        self.handlers = {}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job')
+        self._lock = threading.Lock()
+        self._active = set()
+        self._heartbeat = None
+
+    def register(self, kind, handler):
+        """handler(params, progress) returns (payload, status) like the API routes"""
+        self.handlers[kind] = handler
+
+    def submit(self, kind, params):
+        if kind not in self.handlers:
+            raise KeyError(kind)
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            if len(self._active) >= self.max_pending:
+                raise QueueFull(f'{len(self._active)} jobs already waiting')
+            self._active.add(job_id)
+            self._start_heartbeat()
+
+        try:
+            now = datetime.utcnow()
+            job = self.job_model(id=job_id, kind=kind, status='queued', params=params,
+                                 owner=_owner(), created_at=now, heartbeat_at=now)
+            self.db.session.add(job)
+            self.db.session.commit()
+            self._executor.submit(self._run, job_id)
+        except Exception:
+            with self._lock:
+                self._active.discard(job_id)
+            raise
+        return job
+
+    def recover(self):
+        """Fail queued or running jobs whose owner stopped sending heartbeats"""
+        table = self.job_model.__table__
+        now = datetime.utcnow()
+        expired = now - timedelta(seconds=LEASE_TIMEOUT)
+        with self.db.engine.begin() as connection:
+            result = connection.execute(
+                table.update()
+                .where(table.c.status.in_(['queued', 'running']))
+                .where(table.c.heartbeat_at.is_(None) | (table.c.heartbeat_at < expired))
+                .values(status='failed', error='Interrupted: the worker running it stopped', finished_at=now)
+            )
+        return result.rowcount
+
+    def _start_heartbeat(self):
+        if self._heartbeat is None:
+            self._heartbeat = threading.Thread(target=self._beat, name='job-heartbeat', daemon=True)
+            self._heartbeat.start()
+
+    def _beat(self):
+        table = self.job_model.__table__
+        while True:
+            time.sleep(HEARTBEAT_INTERVAL)
+            try:
+                with self._lock:
+                    active = list(self._active)
+                with self.app.app_context():
+                    if active:
+                        self._write(table.update().where(table.c.id.in_(active))
+                                    .values(heartbeat_at=datetime.utcnow()), wait=False)
+                    self.recover()
+            except Exception as e:
+                print(f"Error refreshing job heartbeats: {e}")
+
+    def _update(self, job_id, wait=True, **values):
+        """Write job columns on a separate connection, committed immediately"""
+        table = self.job_model.__table__
+        values['heartbeat_at'] = datetime.utcnow()
+        self._write(table.update().where(table.c.id == job_id).values(**values), wait)
+
+    def _write(self, statement, wait=True):
+        connection = self.db.engine.connect()
+        # SQLite has one writer: while a handler's transaction holds the lock,
+        # skip a progress or heartbeat write quickly instead of stalling the job
+        busy_timeout = None
+        if not wait and connection.dialect.name == 'sqlite':
+            busy_timeout = connection.exec_driver_sql('PRAGMA busy_timeout').scalar()
+            connection.exec_driver_sql('PRAGMA busy_timeout = 100')
+        try:
+            with connection.begin():
+                connection.execute(statement)
+        finally:
+            if busy_timeout is not None:
+                connection.exec_driver_sql(f'PRAGMA busy_timeout = {int(busy_timeout)}')
+            connection.close()
+
+    def _run(self, job_id):
+        try:
+            with self.app.app_context():
+                try:
+                    self._execute(job_id)
+                finally:
+                    self.db.session.remove()
+        except Exception as e:
+            print(f"Error running job {job_id}: {e}")
+        finally:
+            with self._lock:
+                self._active.discard(job_id)
+
+    def _execute(self, job_id):
+        session = self.db.session
+        job = session.get(self.job_model, job_id)
+        kind, params = job.kind, dict(job.params or {})
+        session.commit()
+        self._update(job_id, status='running', started_at=datetime.utcnow())
+
+        last_write = [0.0]
+
+        def progress(fraction, message=None):
+            now = time.monotonic()
+            if fraction < 1 and now - last_write[0] < PROGRESS_INTERVAL:
+                return
+            last_write[0] = now
+            values = {'progress': round(float(fraction), 4)}
+            if message:
+                values['message'] = message
+            try:
+                self._update(job_id, wait=False, **values)
+            except Exception as e:
+                print(f"Error writing progress of job {job_id}: {e}")
+
+        try:
+            payload, status = self.handlers[kind](params, progress)
+        except Exception as e:
+            payload, status = {'error': str(e)}, 500
+
+        if status >= 400:
+            session.rollback()
+            self._update(job_id, status='failed', finished_at=datetime.utcnow(),
+                         error=payload.get('error', f'Job failed with status {status}'))
+        else:
+            session.commit()
+            self._update(job_id, status='succeeded', result=payload, progress=1.0,
+                         finished_at=datetime.utcnow())
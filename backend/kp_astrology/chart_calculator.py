@@ -1,117 +1,340 @@
 import swisseph as swe
-from datetime import datetime
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
 import math
+import threading
+
+from kp_astrology.cache import freeze, thaw
+from kp_astrology.ephemeris_table import EphemerisTable
+from kp_astrology.houses import house_numbers
+
+# Swiss Ephemeris keeps the sidereal mode and ephemeris path in global C
+# state, so every set_sid_mode + calculation sequence runs under this lock.
+_SWE_LOCK = threading.RLock()
+
+# Per-process calculator used by calculate_many() workers
+_worker_calculator = None
+
+# Julian day of the Unix epoch (1970-01-01 00:00 UT)
+UNIX_EPOCH_JD = 2440587.5
+
+
+def datetime_from_julian_day(jd):
+    """Naive UT datetime for a Julian day"""
+    return datetime(1970, 1, 1) + timedelta(days=float(jd) - UNIX_EPOCH_JD)
+
+
+def julian_days_from_datetimes(datetimes):
+    """
+    Convert a sequence of datetimes/dates (naive values are taken as UT)
+    to a float64 array of Julian days
+    """
+    values = np.asarray(datetimes)
+    if values.dtype == object:
+        values = np.array([
+            v.astimezone(timezone.utc).replace(tzinfo=None)
+            if getattr(v, 'tzinfo', None) is not None else v
+            for v in values.ravel()
+        ]).reshape(values.shape)
+    seconds = values.astype('datetime64[us]').astype(np.int64) / 1e6
+    return seconds / 86400.0 + UNIX_EPOCH_JD
+
 
 class KPChartCalculator:
-    def __init__(self):
+    def __init__(self, ephemeris_table=None, chart_cache=None, house_system=b'P'):
         # Set ephemeris path
-        swe.set_ephe_path()
+        with _SWE_LOCK:
+            swe.set_ephe_path()
         self.kp_ayanamsha = swe.SIDM_KRISHNAMURTI
+        self.house_system = house_system
         
+        # Optional precomputed EphemerisTable used instead of swe.calc_ut
+        if ephemeris_table is not None and ephemeris_table.ayanamsha != self.kp_ayanamsha:
+            raise ValueError("Ephemeris table was built with a different ayanamsha")
+        self.ephemeris_table = ephemeris_table
+        
+        # Optional LRUCache of frozen charts, see chart_cache_key()
+        self.chart_cache = chart_cache
+        self.planet_flags = swe.FLG_SIDEREAL | swe.FLG_SWIEPH | swe.FLG_SPEED
+        self.planet_map = {
+            swe.SUN: 'Sun', swe.MOON: 'Moon', swe.MARS: 'Mars',
+            swe.MERCURY: 'Mercury', swe.JUPITER: 'Jupiter',
+            swe.VENUS: 'Venus', swe.SATURN: 'Saturn',
+            swe.URANUS: 'Uranus', swe.NEPTUNE: 'Neptune',
+            swe.PLUTO: 'Pluto', swe.MEAN_NODE: 'Rahu'
+        }
+        # Column order of the batch arrays: planet_map order, then Ketu
+        self.body_names = list(self.planet_map.values()) + ['Ketu']
+
     def calculate_stock_birth_chart(self, symbol, listing_date, listing_time="10:00", 
                                   exchange_lat=19.0750, exchange_lon=72.8777):
         """
-        Calculate KP birth chart for stock listing
+        Calculate KP birth chart for stock listing.
+
+        The result is always a new dict. With a chart_cache configured its
+        nested values are read-only and shared between callers; use
+        cache.thaw() for a fully mutable copy.
         """
         try:
-            # Parse listing time
-            if isinstance(listing_time, str):
-                time_parts = listing_time.split(':')
-                listing_hour = int(time_parts[0])
-                listing_minute = int(time_parts[1]) if len(time_parts) > 1 else 0
-            else:
-                listing_hour, listing_minute = 10, 0
+            listing_dt = self.listing_datetime(listing_date, listing_time)
             
-            # Create datetime object
-            listing_dt = datetime(
-                listing_date.year, listing_date.month, listing_date.day,
-                listing_hour, listing_minute
-            )
+            if self.chart_cache is None:
+                chart = self._calculate_chart(listing_dt, exchange_lat, exchange_lon)
+                chart['symbol'] = symbol
+                return chart
             
-            # Convert to Julian Day
-            jd = swe.julday(
-                listing_dt.year, listing_dt.month, listing_dt.day,
-                listing_dt.hour + listing_dt.minute/60.0
-            )
+            key = self.chart_cache_key(listing_dt, exchange_lat, exchange_lon)
+            chart = self.chart_cache.get(key)
+            if chart is None:
+                chart = freeze(self._calculate_chart(listing_dt, exchange_lat, exchange_lon))
+                self.chart_cache.put(key, chart)
+            
+            return {'symbol': symbol, **chart}
+            
+        except Exception as e:
+            print(f"Error calculating chart: {e}")
+            return None
+    
+    def calculate_many(self, chart_requests, max_workers=1, chunksize=32):
+        """
+        Calculate many birth charts, in a process pool if max_workers > 1.
+
+        Each request is a dict of calculate_stock_birth_chart() keyword
+        arguments. Requests sharing an instant and location are computed
+        once. Results come back in input order as dicts like
+        calculate_stock_birth_chart() returns, None for failed requests.
+        """
+        entries = []
+        unique = {}
+        for request in chart_requests:
+            try:
+                listing_dt = self.listing_datetime(
+                    request['listing_date'], request.get('listing_time', '10:00')
+                )
+                lat = request.get('exchange_lat', 19.0750)
+                lon = request.get('exchange_lon', 72.8777)
+                key = self.chart_cache_key(listing_dt, lat, lon)
+            except Exception as e:
+                print(f"Error calculating chart: {e}")
+                entries.append((request.get('symbol'), None))
+                continue
             
+            entries.append((request.get('symbol'), key))
+            if key not in unique:
+                cached = self.chart_cache.get(key) if self.chart_cache is not None else None
+                unique[key] = [cached, (listing_dt, lat, lon)]
+        
+        todo = [key for key, (chart, args) in unique.items() if chart is None]
+        if len(todo) <= 1 or max_workers <= 1:
+            computed = [_calculate_chart_safely(self, *unique[key][1]) for key in todo]
+        else:
+            table_path = self.ephemeris_table.path if self.ephemeris_table is not None else None
+            with ProcessPoolExecutor(
+                max_workers=max_workers, initializer=_init_worker,
+                initargs=(table_path, self.house_system, self.kp_ayanamsha)
+            ) as executor:
+                computed = list(executor.map(
+                    _calculate_chart_worker, [unique[key][1] for key in todo],
+                    chunksize=chunksize
+                ))
+        
+        for key, chart in zip(todo, computed):
+            if chart is not None and self.chart_cache is not None:
+                chart = freeze(chart)
+                self.chart_cache.put(key, chart)
+            unique[key][0] = chart
+        
+        results = []
+        for symbol, key in entries:
+            chart = unique[key][0] if key is not None else None
+            if chart is None:
+                results.append(None)
+            elif self.chart_cache is not None:
+                results.append({'symbol': symbol, **chart})
+            else:
+                results.append({'symbol': symbol, **thaw(chart)})
+        return results
+    
+    def listing_datetime(self, listing_date, listing_time="10:00"):
+        """Combine a listing date and "HH:MM" time (taken as UT) into a datetime"""
+        if isinstance(listing_time, str):
+            time_parts = listing_time.split(':')
+            listing_hour = int(time_parts[0])
+            listing_minute = int(time_parts[1]) if len(time_parts) > 1 else 0
+        else:
+            listing_hour, listing_minute = 10, 0
+        
+        return datetime(
+            listing_date.year, listing_date.month, listing_date.day,
+            listing_hour, listing_minute
+        )
+    
+    def chart_cache_key(self, listing_dt, exchange_lat, exchange_lon):
+        """Cache key: (UT instant, lat, lon, ayanamsha, house system)"""
+        return (
+            listing_dt.isoformat(), round(float(exchange_lat), 6),
+            round(float(exchange_lon), 6), self.kp_ayanamsha, self.house_system
+        )
+    
+    def calculate_houses(self, jd, latitude, longitude):
+        """Sidereal house cusps and ascendant for a Julian day"""
+        with _SWE_LOCK:
+            swe.set_sid_mode(self.kp_ayanamsha)
+            cusps, ascmc = swe.houses_ex(
+                jd, latitude, longitude, self.house_system, swe.FLG_SIDEREAL
+            )
+        return [float(c) for c in cusps[:12]], float(ascmc[0])
+
+    def next_sunrise(self, jd, latitude, longitude):
+        """Julian day (UT) of the first sunrise after jd, or None where the Sun does not rise"""
+        with _SWE_LOCK:
+            result, times = swe.rise_trans(
+                jd, swe.SUN, swe.CALC_RISE | swe.BIT_HINDU_RISING, (longitude, latitude, 0.0)
+            )
+        return float(times[0]) if result == 0 else None
+
+    def _calculate_chart(self, listing_dt, exchange_lat, exchange_lon):
+        """Compute cusps, ascendant, planets and house positions for an instant"""
+        # Convert to Julian Day
+        jd = swe.julday(
+            listing_dt.year, listing_dt.month, listing_dt.day,
+            listing_dt.hour + listing_dt.minute/60.0
+        )
+        
+        with _SWE_LOCK:
             # Set ayanamsha
             swe.set_sid_mode(self.kp_ayanamsha)
             
-            # Calculate houses using Placidus system
+            # Calculate houses (Placidus by default)
             cusps, ascmc = swe.houses_ex(
-                jd, exchange_lat, exchange_lon, b'P', swe.FLG_SIDEREAL
+                jd, exchange_lat, exchange_lon, self.house_system, swe.FLG_SIDEREAL
             )
             
             # Get planet positions
             planets = {}
-            planet_map = {
-                swe.SUN: 'Sun', swe.MOON: 'Moon', swe.MARS: 'Mars',
-                swe.MERCURY: 'Mercury', swe.JUPITER: 'Jupiter',
-                swe.VENUS: 'Venus', swe.SATURN: 'Saturn',
-                swe.URANUS: 'Uranus', swe.NEPTUNE: 'Neptune',
-                swe.PLUTO: 'Pluto', swe.MEAN_NODE: 'Rahu'
-            }
+            table_positions = None
+            if self.ephemeris_table is not None and self.ephemeris_table.covers([jd]):
+                table_positions = self.ephemeris_table.interpolate([jd])[0]
             
-            for planet_code, planet_name in planet_map.items():
-                flags = swe.FLG_SIDEREAL | swe.FLG_SWIEPH
-                ret, position = swe.calc_ut(jd, planet_code, flags)
+            for column, (planet_code, planet_name) in enumerate(self.planet_map.items()):
+                if table_positions is not None:
+                    position = table_positions[column]
+                else:
+                    position, ret = swe.calc_ut(jd, planet_code, self.planet_flags)
                 planets[planet_name] = {
-                    'longitude': position[0],
-                    'latitude': position[1],
-                    'distance': position[2],
-                    'speed_longitude': position[3]
+                    'longitude': float(position[0]),
+                    'latitude': float(position[1]),
+                    'distance': float(position[2]),
+                    'speed_longitude': float(position[3])
                 }
+        
+        # Calculate Ketu (180 degrees from Rahu)
+        rahu_long = planets['Rahu']['longitude']
+        ketu_long = (rahu_long + 180) % 360
+        planets['Ketu'] = {
+            'longitude': ketu_long,
+            'latitude': 0,
+            'distance': 0,
+            'speed_longitude': planets['Rahu']['speed_longitude']
+        }
+        
+        # Calculate house positions for planets
+        house_positions = self._calculate_house_positions(cusps, planets)
+        
+        return {
+            'listing_datetime': listing_dt.isoformat(),
+            'cusps': [float(c) for c in cusps[:12]],
+            'ascendant': float(ascmc[0]),
+            'planets': planets,
+            'house_positions': house_positions
+        }
+    
+    def calculate_planet_positions_batch(self, julian_days, bodies=None):
+        """
+        Calculate sidereal positions of every body for an array of Julian days.
+
+        Returns a dict of (days x bodies) arrays, columns in `body_names`
+        order, or in the order of `bodies` when only a subset is wanted.
+        """
+        jds = np.ascontiguousarray(julian_days, dtype=np.float64).ravel()
+        names = list(bodies) if bodies is not None else list(self.body_names)
+        needed = [
+            code for code, name in self.planet_map.items()
+            if name in names or (name == 'Rahu' and 'Ketu' in names)
+        ]
+        
+        # name -> (longitude, latitude, speed_longitude) columns
+        computed = {}
+        if self.ephemeris_table is not None and self.ephemeris_table.covers(jds):
+            positions = self.ephemeris_table.interpolate(jds)
+            table_columns = list(self.planet_map)
+            for planet_code in needed:
+                column = table_columns.index(planet_code)
+                computed[self.planet_map[planet_code]] = (
+                    positions[:, column, 0], positions[:, column, 1], positions[:, column, 3]
+                )
+        else:
+            calc_ut = swe.calc_ut
+            flags = self.planet_flags
+            jd_list = jds.tolist()
             
-            # Calculate Ketu (180 degrees from Rahu)
-            rahu_long = planets['Rahu']['longitude']
-            ketu_long = (rahu_long + 180) % 360
-            planets['Ketu'] = {
-                'longitude': ketu_long,
-                'latitude': 0,
-                'distance': 0,
-                'speed_longitude': planets['Rahu']['speed_longitude']
-            }
-            
-            # Calculate house positions for planets
-            house_positions = self._calculate_house_positions(cusps, planets)
-            
-            return {
-                'symbol': symbol,
-                'listing_datetime': listing_dt.isoformat(),
-                'cusps': [float(c) for c in cusps[:12]],
-                'ascendant': float(ascmc[0]),
-                'planets': planets,
-                'house_positions': house_positions
-            }
-            
-        except Exception as e:
-            print(f"Error calculating chart: {e}")
-            return None
+            with _SWE_LOCK:
+                swe.set_sid_mode(self.kp_ayanamsha)
+                for planet_code in needed:
+                    positions = np.array(
+                        [calc_ut(jd, planet_code, flags)[0] for jd in jd_list],
+                        dtype=np.float64
+                    ).reshape(-1, 6)
+                    computed[self.planet_map[planet_code]] = (
+                        positions[:, 0], positions[:, 1], positions[:, 3]
+                    )
+        
+        # Ketu mirrors Rahu
+        if 'Ketu' in names:
+            rahu_longitude, rahu_latitude, rahu_speed = computed['Rahu']
+            computed['Ketu'] = (
+                (rahu_longitude + 180) % 360, np.zeros_like(rahu_latitude), rahu_speed
+            )
+        
+        shape = (jds.shape[0], len(names))
+        return {
+            'bodies': names,
+            'julian_days': jds,
+            'longitude': np.column_stack([computed[name][0] for name in names]).reshape(shape),
+            'latitude': np.column_stack([computed[name][1] for name in names]).reshape(shape),
+            'speed_longitude': np.column_stack([computed[name][2] for name in names]).reshape(shape)
+        }
     
     def _calculate_house_positions(self, cusps, planets):
         """Determine which house each planet is in"""
-        house_positions = {}
-        
-        for planet_name, planet_data in planets.items():
-            longitude = planet_data['longitude']
-            house_num = self._find_house_number(longitude, cusps)
-            house_positions[planet_name] = house_num
-            
-        return house_positions
+        names = list(planets)
+        longitudes = [planets[name]['longitude'] for name in names]
+        houses = house_numbers(cusps[:12], longitudes)
+        return {name: int(house) for name, house in zip(names, houses)}
     
     def _find_house_number(self, longitude, cusps):
         """Find house number for given longitude"""
-        longitude = longitude % 360
-        
-        for i in range(12):
-            start_cusp = cusps[i]
-            end_cusp = cusps[(i + 1) % 12]
-            
-            if end_cusp < start_cusp:
-                if longitude >= start_cusp or longitude < end_cusp:
-                    return i + 1
-            else:
-                if start_cusp <= longitude < end_cusp:
-                    return i + 1
-        
-        return 1
+        return int(house_numbers(cusps[:12], [longitude])[0])
+
+
+def _calculate_chart_safely(calculator, listing_dt, exchange_lat, exchange_lon):
+    try:
+        return calculator._calculate_chart(listing_dt, exchange_lat, exchange_lon)
+    except Exception as e:
+        print(f"Error calculating chart: {e}")
+        return None
+
+
+def _init_worker(ephemeris_table_path, house_system, ayanamsha):
+    """ProcessPoolExecutor initializer: one calculator per worker process"""
+    global _SWE_LOCK, _worker_calculator
+    # A forked child may inherit the lock in a held state
+    _SWE_LOCK = threading.RLock()
+    table = EphemerisTable(ephemeris_table_path) if ephemeris_table_path else None
+    _worker_calculator = KPChartCalculator(ephemeris_table=table, house_system=house_system)
+    _worker_calculator.kp_ayanamsha = ayanamsha
+
+
+def _calculate_chart_worker(args):
+    return _calculate_chart_safely(_worker_calculator, *args)
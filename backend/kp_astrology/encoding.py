@@ -0,0 +1,53 @@
+"""
+Compact integer encoding of planets and significator sets.
+
+Planets are small ints (indices into significator.BODIES) and a set of
+planets is a 16-bit mask with bit `code` set for each member, so unions
+and intersections are bitwise | and &. Scoring a set against a weight
+vector is a single lookup in a table indexed by the mask.
+"""
+import numpy as np
+
+from kp_astrology.significator import BODIES, BODY_CODES
+
+MASK_DTYPE = np.dtype('<u2')
+BIT_VALUES = (1 << np.arange(len(BODIES))).astype(MASK_DTYPE)
+# Bits of every possible mask, (2**len(BODIES) x len(BODIES))
+_MASK_BITS = ((np.arange(1 << len(BODIES), dtype=MASK_DTYPE)[:, None] & BIT_VALUES[None, :]) != 0)
+
+
+def encode_planets(names):
+    """Mask for an iterable of planet names (unknown names are ignored)"""
+    mask = 0
+    for name in names:
+        code = BODY_CODES.get(name)
+        if code is not None:
+            mask |= 1 << code
+    return mask
+
+
+def decode_mask(mask):
+    """Planet names in a mask, in BODIES order"""
+    mask = int(mask)
+    return [name for code, name in enumerate(BODIES) if mask >> code & 1]
+
+
+def weight_vector(weights):
+    """Dense float array over BODIES from a {planet: weight} dict"""
+    return np.array([weights.get(name, 0.0) for name in BODIES], dtype=np.float64)
+
+
+def score_table(weights):
+    """Lookup table: score_table(weights)[mask] == sum of member weights"""
+    if isinstance(weights, dict):
+        weights = weight_vector(weights)
+    return _MASK_BITS @ np.asarray(weights, dtype=np.float64)
+
+
+def pack_masks(masks):
+    """Bytes for storage (little-endian uint16 per house)"""
+    return np.asarray(masks, dtype=MASK_DTYPE).tobytes()
+
+
+def unpack_masks(data):
+    return np.frombuffer(data, dtype=MASK_DTYPE)
@@ -0,0 +1,162 @@
+"""
+Precomputed sidereal ephemeris stored as a fixed-width binary table.
+
+The file holds one record per body per day with the six values returned by
+swe.calc_ut (longitude, latitude, distance and their speeds), written under
+the KP ayanamsha. It is opened with mmap, so every worker process shares the
+same page-cached copy and lookups become array indexing.
+
+Intraday positions are interpolated with cubic Hermite splines using the
+stored daily speeds. Longitude error against swe.calc_ut at random instants
+over 1900-2100, in arc-seconds (`python build_ephemeris_table.py --check`
+prints the same percentiles for a table):
+
+    body      p99     p99.9   max
+    Sun       0.001   0.001   0.001
+    Moon      0.46    0.56    0.63
+    Mercury   0.06    0.09    2.6
+    Venus     0.003   0.004   1.3
+    Mars      0.001   0.002   3.6
+    Jupiter   0.001   0.07    8
+    Saturn    0.001   0.01    11
+    Uranus    0.001   0.19    9.5
+    Neptune   0.001   0.04    13
+    Pluto     0.001   0.001   1.5
+    Rahu      0.001   0.001   0.001
+
+The tails come from the built-in Moshier ephemeris itself jumping between
+series segments, so they are not spread evenly over time: over 1990-2010
+Neptune's p99.9 is 0.4-0.65 arc-second. All of these are far below the
+shortest KP sub-sub division (~2 arc-minutes).
+"""
+import mmap
+import os
+import struct
+
+import numpy as np
+import swisseph as swe
+
+MAGIC = b'KPEPHEM1'
+# magic, ayanamsha, number of bodies, number of days, start JD, step (days)
+HEADER_FORMAT = '<8siiidd'
+HEADER_SIZE = 64
+FIELDS = ('longitude', 'latitude', 'distance',
+          'speed_longitude', 'speed_latitude', 'speed_distance')
+
+DEFAULT_TABLE_PATH = os.environ.get(
+    'KP_EPHEMERIS_TABLE',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                 'ephemeris', 'kp_sidereal_1900_2100.bin')
+)
+
+
+class EphemerisTable:
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as fh:
+            self._mmap = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, ayanamsha, n_bodies, n_days, start_jd, step = struct.unpack_from(
+            HEADER_FORMAT, self._mmap, 0
+        )
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a KP ephemeris table")
+
+        self.ayanamsha = ayanamsha
+        self.start_jd = start_jd
+        self.step = step
+        self.n_days = n_days
+        self.end_jd = start_jd + (n_days - 1) * step
+        self.data = np.frombuffer(
+            self._mmap, dtype='<f8', count=n_days * n_bodies * len(FIELDS),
+            offset=HEADER_SIZE
+        ).reshape(n_days, n_bodies, len(FIELDS))
+
+    def covers(self, julian_days):
+        """True if every Julian day lies inside the table"""
+        jds = np.asarray(julian_days, dtype=np.float64)
+        return bool(np.all((jds >= self.start_jd) & (jds < self.end_jd)))
+
+    def interpolate(self, julian_days):
+        """
+        Interpolated (days x bodies x 6) array of calc_ut values for the
+        given Julian days
+        """
+        jds = np.asarray(julian_days, dtype=np.float64).ravel()
+        if not self.covers(jds):
+            raise ValueError("Julian day outside ephemeris table range")
+
+        offset = (jds - self.start_jd) / self.step
+        index = np.minimum(offset.astype(np.int64), self.n_days - 2)
+        f = (offset - index)[:, None]
+
+        before = self.data[index]
+        after = self.data[index + 1]
+
+        # Hermite basis functions and their derivatives
+        f2 = f * f
+        f3 = f2 * f
+        h10 = f3 - 2 * f2 + f
+        h01 = -2 * f3 + 3 * f2
+        h11 = f3 - f2
+        d10 = 3 * f2 - 4 * f + 1
+        d01 = -6 * f2 + 6 * f
+        d11 = 3 * f2 - 2 * f
+
+        result = np.empty_like(before)
+        for value, speed in ((0, 3), (1, 4), (2, 5)):
+            p0 = before[:, :, value]
+            delta = after[:, :, value] - p0
+            if value == 0:
+                delta = (delta + 180) % 360 - 180
+            m0 = before[:, :, speed] * self.step
+            m1 = after[:, :, speed] * self.step
+            result[:, :, value] = p0 + h10 * m0 + h01 * delta + h11 * m1
+            result[:, :, speed] = (d10 * m0 + d01 * delta + d11 * m1) / self.step
+
+        result[:, :, 0] %= 360
+        return result
+
+    def close(self):
+        self.data = None
+        self._mmap.close()
+
+
+def build_ephemeris_table(path, calculator, start_year=1900, end_year=2100, chunk_days=4096):
+    """Write a daily table for [start_year, end_year] using swe.calc_ut"""
+    start_jd = swe.julday(start_year, 1, 1, 0.0)
+    # One extra day so the last day can still be interpolated
+    end_jd = swe.julday(end_year + 1, 1, 1, 0.0) + 1
+    n_days = int(round(end_jd - start_jd)) + 1
+    planet_codes = list(calculator.planet_map)
+
+    tmp_path = path + '.tmp'
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(tmp_path, 'wb') as fh:
+        header = struct.pack(HEADER_FORMAT, MAGIC, calculator.kp_ayanamsha,
+                             len(planet_codes), n_days, start_jd, 1.0)
+        fh.write(header.ljust(HEADER_SIZE, b'\0'))
+
+        swe.set_sid_mode(calculator.kp_ayanamsha)
+        for first in range(0, n_days, chunk_days):
+            jds = (start_jd + np.arange(first, min(first + chunk_days, n_days))).tolist()
+            chunk = np.empty((len(jds), len(planet_codes), len(FIELDS)), dtype='<f8')
+            for column, planet_code in enumerate(planet_codes):
+                chunk[:, column, :] = [
+                    swe.calc_ut(jd, planet_code, calculator.planet_flags)[0] for jd in jds
+                ]
+            fh.write(chunk.tobytes())
+
+    os.replace(tmp_path, path)
+    return path
+
+
+def open_default_table(path=DEFAULT_TABLE_PATH):
+    """Open the precomputed table if it has been built, else return None"""
+    if not os.path.exists(path):
+        return None
+    try:
+        return EphemerisTable(path)
+    except Exception as e:
+        print(f"Error opening ephemeris table {path}: {e}")
+        return None
@@ -0,0 +1,32 @@
+import numpy as np
+
+
+def house_numbers(cusps, longitudes):
+    """
+    Vectorized house placement.
+
+    cusps is an (..., 12) array of cusp longitudes and longitudes an
+    (..., bodies) array; leading dimensions broadcast, so an (N x 12) cusp
+    matrix places an (N x bodies) longitude matrix chart by chart, and a
+    single natal (12,) cusp row places a (days x bodies) transit matrix.
+    Returns int8 house numbers 1-12 with the same shape as the broadcast
+    longitudes.
+    """
+    cusps = np.asarray(cusps, dtype=np.float64)
+    longitudes = np.asarray(longitudes, dtype=np.float64)
+
+    # Measure everything from the 1st cusp so the 360 -> 0 wrap disappears:
+    # cusp offsets then increase from 0 and a body's house is the number of
+    # cusps at or before it.
+    first = cusps[..., :1]
+    cusp_offsets = np.mod(cusps - first, 360)
+    body_offsets = np.mod(longitudes - first, 360)
+
+    passed = cusp_offsets[..., None, :] <= body_offsets[..., :, None]
+    return passed.sum(axis=-1, dtype=np.int8)
+
+
+def equal_house_cusps(ascendants):
+    """(..., 12) equal-house cusps starting at each ascendant"""
+    ascendants = np.asarray(ascendants, dtype=np.float64)
+    return np.mod(ascendants[..., None] + 30.0 * np.arange(12), 360)
@@ -0,0 +1,122 @@
+"""
+KP ruling planets for a location at the current minute.
+
+Results are cached per minute. Inside a new minute only the ascendant and
+the Moon's longitude are recomputed (one houses_ex and one calc_ut call):
+the Moon's lords are reused until the earliest time the Moon could reach
+its next sub boundary, and the day lord until the next sunrise. The KP weekday runs from sunrise to sunrise, so
+before local sunrise the previous weekday's lord rules; where the Sun does
+not rise the day changes at local midnight.
+"""
+from datetime import datetime, time, timedelta
+import threading
+
+import numpy as np
+
+from kp_astrology.cache import LRUCache
+from kp_astrology.chart_calculator import KPChartCalculator, julian_days_from_datetimes
+from kp_astrology.sub_lords import SUB_TABLE, kp_lords
+
+# Python weekday() order: Monday = 0
+DAY_LORDS = ('Moon', 'Mars', 'Mercury', 'Jupiter', 'Venus', 'Saturn', 'Sun')
+# Upper bound on the Moon's daily motion, used to decide when its lords can change
+MOON_MAX_SPEED = 15.5
+
+
+class RulingPlanetsService:
+    def __init__(self, calculator=None, latitude=19.0750, longitude=72.8777,
+                 utc_offset_minutes=330, cache_size=120):
+        self.calculator = calculator or KPChartCalculator()
+        self.latitude = latitude
+        self.longitude = longitude
+        self.utc_offset = timedelta(minutes=utc_offset_minutes)
+        self.cache = LRUCache(maxsize=cache_size)
+        self._lock = threading.Lock()
+        self._moon = None  # (computed_jd, valid_until_jd, (sign, star, sub lord))
+        self._day = None  # (sunrise_jd, next_sunrise_jd, day lord)
+
+    def get(self, now=None):
+        """Ruling planets for the minute containing `now` (naive UTC)"""
+        minute = (now or datetime.utcnow()).replace(second=0, microsecond=0)
+        result = self.cache.get(minute)
+        if result is None:
+            with self._lock:
+                result = self.cache.get(minute)
+                if result is None:
+                    result = self._compute(minute)
+                    self.cache.put(minute, result)
+        return result
+
+    def _compute(self, minute):
+        jd = float(julian_days_from_datetimes([minute])[0])
+
+        cusps, ascendant = self.calculator.calculate_houses(jd, self.latitude, self.longitude)
+        ascendant_lords = kp_lords(ascendant)
+        moon = self._moon_lords(jd)
+        day_lord = self._day_lord(minute, jd)
+
+        ruling = []
+        for planet in (ascendant_lords[2], ascendant_lords[1], ascendant_lords[0],
+                       moon['sub_lord'], moon['star_lord'], moon['sign_lord'], day_lord):
+            if planet not in ruling:
+                ruling.append(planet)
+
+        return {
+            'timestamp': minute.isoformat() + 'Z',
+            'latitude': self.latitude,
+            'longitude': self.longitude,
+            'ascendant': {
+                'degree': round(ascendant, 4),
+                'sign_lord': ascendant_lords[0],
+                'star_lord': ascendant_lords[1],
+                'sub_lord': ascendant_lords[2]
+            },
+            'moon': moon,
+            'day_lord': day_lord,
+            'ruling_planets': ruling
+        }
+
+    def _moon_lords(self, jd):
+        positions = self.calculator.calculate_planet_positions_batch([jd], ['Moon'])
+        longitude = float(positions['longitude'][0, 0])
+
+        if self._moon is None or not self._moon[0] <= jd < self._moon[1]:
+            sign_lord, star_lord, sub_lord, sub_sub_lord = kp_lords(longitude)
+
+            # Degrees to the next sub boundary; the Moon cannot get there sooner
+            # than at its maximum speed
+            starts = SUB_TABLE['starts']
+            row = int(np.searchsorted(starts, longitude, side='right'))
+            next_boundary = starts[row] if row < len(starts) else 360.0
+            valid_until = jd + (next_boundary - longitude) / MOON_MAX_SPEED
+            self._moon = (jd, valid_until, (sign_lord, star_lord, sub_lord))
+
+        sign_lord, star_lord, sub_lord = self._moon[2]
+        return {
+            'degree': round(longitude, 4),
+            'sign_lord': sign_lord,
+            'star_lord': star_lord,
+            'sub_lord': sub_lord
+        }
+
+    def _day_lord(self, minute, jd):
+        if self._day is not None and self._day[0] <= jd < self._day[1]:
+            return self._day[2]
+
+        local_date = (minute + self.utc_offset).date()
+        midnight = float(julian_days_from_datetimes(
+            [datetime.combine(local_date, time()) - self.utc_offset]
+        )[0])
+        sunrise = self._sunrise(midnight)
+        if jd < sunrise:
+            local_date -= timedelta(days=1)
+            start, end = self._sunrise(midnight - 1), sunrise
+        else:
+            start, end = sunrise, self._sunrise(midnight + 1)
+        self._day = (start, end, DAY_LORDS[local_date.weekday()])
+        return self._day[2]
+
+    def _sunrise(self, midnight):
+        """First sunrise after a local midnight (Julian days), or the midnight itself without one"""
+        sunrise = self.calculator.next_sunrise(midnight, self.latitude, self.longitude)
+        return midnight if sunrise is None or sunrise >= midnight + 1 else sunrise
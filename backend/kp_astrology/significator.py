@@ -1,16 +1,15 @@
+import numpy as np
+
+from kp_astrology.houses import house_numbers
+from kp_astrology.sub_lords import PLANETS, kp_lords, kp_lords_array, sub_lord as kp_sub_lord
+
+# Integer codes used by the batch significator arrays: the nine KP lords
+# (same codes as sub_lords.PLANETS) followed by the outer planets
+BODIES = PLANETS + ('Uranus', 'Neptune', 'Pluto')
+BODY_CODES = {name: code for code, name in enumerate(BODIES)}
+
+
 class KPSignificator:
-    def __init__(self):
-        self.nakshatra_length = 13.333333333333334
-        self.sign_length = 30.0
-        
-        self.sign_lords = [
-            'Mars', 'Venus', 'Mercury', 'Moon', 'Sun', 'Mercury',
-            'Venus', 'Mars', 'Jupiter', 'Saturn', 'Saturn', 'Jupiter'
-        ]
-        
-        self.nakshatra_lords = ['Ketu', 'Venus', 'Sun', 'Moon', 'Mars', 'Rahu',
-                               'Jupiter', 'Saturn', 'Mercury'] * 3
-    
     def find_house_significators(self, birth_chart, house_number):
         """Find KP significators for a specific house"""
         if house_number < 1 or house_number > 12:
@@ -18,16 +17,8 @@ class KPSignificator:
             
         house_cusp = birth_chart['cusps'][house_number - 1]
         
-        # Get sign lord
-        sign_index = int(house_cusp / self.sign_length)
-        sign_lord = self.sign_lords[sign_index]
-        
-        # Get star lord
-        nakshatra_index = int(house_cusp / self.nakshatra_length)
-        star_lord = self.nakshatra_lords[nakshatra_index]
-        
-        # Get sub lord
-        sub_lord = self._calculate_sub_lord(house_cusp)
+        # Get sign, star and sub lords from the KP sub table
+        sign_lord, star_lord, sub_lord, sub_sub_lord = kp_lords(house_cusp)
         
         # Find planets occupying this house
         occupants = self._find_house_occupants(birth_chart, house_number)
@@ -40,16 +31,54 @@ class KPSignificator:
             'cuspal_sign_lord': sign_lord,
             'cuspal_star_lord': star_lord,
             'cuspal_sub_lord': sub_lord,
+            'cuspal_sub_sub_lord': sub_sub_lord,
             'occupying_planets': occupants,
             'all_significators': all_significators
         }
     
+    def find_house_significators_batch(self, cusps, longitudes, bodies):
+        """
+        Find KP significators for all 12 houses of N charts at once.
+
+        cusps is an (N x 12) cusp matrix and longitudes an (N x len(bodies))
+        matrix of body longitudes. Returns a columnar dict of integer codes
+        (indices into BODIES):
+            sign_lord, star_lord, sub_lord, sub_sub_lord: (N x 12) int8
+            occupants, significators: (N x 12 x len(BODIES)) bool
+        """
+        cusps = np.asarray(cusps, dtype=np.float64).reshape(-1, 12)
+        longitudes = np.asarray(longitudes, dtype=np.float64).reshape(len(cusps), -1)
+        n_charts = len(cusps)
+        
+        lords = kp_lords_array(cusps)
+        
+        # Occupants: one house lookup for every body of every chart
+        codes = np.array([BODY_CODES.get(body, -1) for body in bodies], dtype=np.int64)
+        known = codes >= 0
+        houses = house_numbers(cusps, longitudes[:, known]).astype(np.int64) - 1
+        occupants = np.zeros((n_charts, 12, len(BODIES)), dtype=bool)
+        chart_index = np.arange(n_charts)[:, None]
+        occupants[chart_index, houses, codes[known][None, :]] = True
+        
+        # Significators: cuspal sign/star/sub lords plus occupants
+        significators = occupants.copy()
+        house_index = np.arange(12)[None, :]
+        for column in ('sign_lord', 'star_lord', 'sub_lord'):
+            significators[chart_index, house_index, lords[column]] = True
+        
+        return {
+            'bodies': BODIES,
+            'sign_lord': lords['sign_lord'],
+            'star_lord': lords['star_lord'],
+            'sub_lord': lords['sub_lord'],
+            'sub_sub_lord': lords['sub_sub_lord'],
+            'occupants': occupants,
+            'significators': significators
+        }
+    
     def _calculate_sub_lord(self, longitude):
-        """Simplified sub-lord calculation"""
-        nakshatra_index = int(longitude / self.nakshatra_length)
-        sub_lords = ['Ketu', 'Venus', 'Sun', 'Moon', 'Mars', 'Rahu',
-                    'Jupiter', 'Saturn', 'Mercury']
-        return sub_lords[nakshatra_index % 9]
+        """KP sub lord from the 249-division sub table"""
+        return kp_sub_lord(longitude)
     
     def _find_house_occupants(self, birth_chart, house_number):
         """Find planets occupying the given house"""
@@ -0,0 +1,112 @@
+"""
+KP sub and sub-sub lord tables.
+
+Each nakshatra (13 deg 20') is divided into nine subs in Vimshottari
+proportion, starting with the nakshatra lord, and each sub is divided again
+into nine sub-subs starting with the sub lord. Divisions that straddle a
+sign boundary are split so the sign lord is constant within every entry,
+which gives the standard 249-row sub table. Boundaries are computed exactly
+with fractions and stored as sorted float arrays, so a longitude lookup is
+a single bisect (or np.searchsorted for arrays).
+"""
+from bisect import bisect_right
+from fractions import Fraction
+
+import numpy as np
+
+# Integer codes for lords are indices into PLANETS
+PLANETS = ('Sun', 'Moon', 'Mars', 'Mercury', 'Jupiter', 'Venus', 'Saturn', 'Rahu', 'Ketu')
+PLANET_CODES = {name: code for code, name in enumerate(PLANETS)}
+
+SIGN_LORDS = ('Mars', 'Venus', 'Mercury', 'Moon', 'Sun', 'Mercury',
+              'Venus', 'Mars', 'Jupiter', 'Saturn', 'Saturn', 'Jupiter')
+
+# Vimshottari dasha order and years (total 120)
+VIMSHOTTARI = (('Ketu', 7), ('Venus', 20), ('Sun', 6), ('Moon', 10), ('Mars', 7),
+               ('Rahu', 18), ('Jupiter', 16), ('Saturn', 19), ('Mercury', 17))
+
+NAKSHATRA_ARC = Fraction(40, 3)
+SIGN_ARC = Fraction(30)
+
+
+def _divisions(depth):
+    """(start, end, lords...) rows in exact arithmetic, `depth` levels below the star"""
+    rows = []
+    for nakshatra in range(27):
+        start = nakshatra * NAKSHATRA_ARC
+        rows.extend(_subdivide(start, NAKSHATRA_ARC, nakshatra % 9, depth, ()))
+    return rows
+
+
+def _subdivide(start, arc, first, depth, lords):
+    lords = lords + (VIMSHOTTARI[first][0],)
+    if depth == 0:
+        return [(start, start + arc, lords)]
+    rows = []
+    for offset in range(9):
+        index = (first + offset) % 9
+        part = arc * VIMSHOTTARI[index][1] / 120
+        rows.extend(_subdivide(start, part, index, depth - 1, lords))
+        start += part
+    return rows
+
+
+def _build_table(depth):
+    """Split rows at sign boundaries and encode them as sorted arrays"""
+    starts, sign_lords, lord_columns = [], [], []
+    for start, end, lords in _divisions(depth):
+        while start < end:
+            sign = int(start // SIGN_ARC)
+            starts.append(start)
+            sign_lords.append(PLANET_CODES[SIGN_LORDS[sign]])
+            lord_columns.append([PLANET_CODES[lord] for lord in lords])
+            start = min(end, (sign + 1) * SIGN_ARC)
+
+    lord_columns = np.array(lord_columns, dtype=np.int8)
+    table = {
+        'starts': np.array([float(s) for s in starts]),
+        'sign_lord': np.array(sign_lords, dtype=np.int8),
+        'star_lord': lord_columns[:, 0],
+        'sub_lord': lord_columns[:, 1],
+    }
+    if depth > 1:
+        table['sub_sub_lord'] = lord_columns[:, 2]
+    return table
+
+
+# 249 rows: sign/star/sub lord per division
+SUB_TABLE = _build_table(1)
+# Sub-sub divisions (also split at sign boundaries)
+SUB_SUB_TABLE = _build_table(2)
+
+_SUB_SUB_STARTS = SUB_SUB_TABLE['starts'].tolist()
+_SUB_SUB_ROWS = list(zip(
+    *(SUB_SUB_TABLE[column].tolist()
+      for column in ('sign_lord', 'star_lord', 'sub_lord', 'sub_sub_lord'))
+))
+
+
+def kp_lords(longitude):
+    """(sign lord, star lord, sub lord, sub-sub lord) names for a longitude"""
+    row = bisect_right(_SUB_SUB_STARTS, longitude % 360) - 1
+    return tuple(PLANETS[code] for code in _SUB_SUB_ROWS[row])
+
+
+def sub_lord(longitude):
+    """KP sub lord name for a longitude"""
+    return kp_lords(longitude)[2]
+
+
+def kp_lords_array(longitudes):
+    """
+    Vectorized lookup: dict of int8 code arrays (indices into PLANETS)
+    with the same shape as `longitudes`
+    """
+    longitudes = np.mod(np.asarray(longitudes, dtype=np.float64), 360)
+    rows = np.searchsorted(SUB_SUB_TABLE['starts'], longitudes, side='right') - 1
+    return {
+        'sign_lord': SUB_SUB_TABLE['sign_lord'][rows],
+        'star_lord': SUB_SUB_TABLE['star_lord'][rows],
+        'sub_lord': SUB_SUB_TABLE['sub_lord'][rows],
+        'sub_sub_lord': SUB_SUB_TABLE['sub_sub_lord'][rows],
+    }
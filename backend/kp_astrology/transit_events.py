@@ -0,0 +1,279 @@
+"""
+Exact transit event timeline.
+
+For every body the engine finds the instants at which it changes sign,
+nakshatra or KP sub, and the stations where it turns retrograde or direct.
+The ephemeris is sampled once a day (no body can cross two sub boundaries
+and turn around within a day), stations are located by bisecting the speed
+sign change, and each boundary crossing inside the resulting monotonic
+intervals is refined with a bracketed Newton iteration on the longitude
+(speed is the derivative) to better than one second. All crossings of a
+body are refined together as arrays.
+
+Events are kept in a TransitEventIndex: a structured NumPy array sorted by
+Julian day that can be saved to disk and sliced by date range.
+"""
+import os
+
+import numpy as np
+
+from kp_astrology.chart_calculator import KPChartCalculator, datetime_from_julian_day
+from kp_astrology.sub_lords import NAKSHATRA_ARC, SUB_TABLE, VIMSHOTTARI
+
+SIGNS = ('Aries', 'Taurus', 'Gemini', 'Cancer', 'Leo', 'Virgo',
+         'Libra', 'Scorpio', 'Sagittarius', 'Capricorn', 'Aquarius', 'Pisces')
+NAKSHATRAS = ('Ashwini', 'Bharani', 'Krittika', 'Rohini', 'Mrigashira', 'Ardra',
+              'Punarvasu', 'Pushya', 'Ashlesha', 'Magha', 'Purva Phalguni', 'Uttara Phalguni',
+              'Hasta', 'Chitra', 'Swati', 'Vishakha', 'Anuradha', 'Jyeshtha',
+              'Mula', 'Purva Ashadha', 'Uttara Ashadha', 'Shravana', 'Dhanishta', 'Shatabhisha',
+              'Purva Bhadrapada', 'Uttara Bhadrapada', 'Revati')
+
+KINDS = ('sign', 'nakshatra', 'sub', 'retrograde', 'direct')
+EVENT_DTYPE = np.dtype([
+    ('jd', '<f8'), ('body', 'i1'), ('kind', 'i1'), ('from', '<i2'), ('to', '<i2')
+])
+
+DEFAULT_INDEX_PATH = os.environ.get(
+    'KP_TRANSIT_EVENTS',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                 'ephemeris', 'kp_transit_events.npz')
+)
+
+# Refine event times to half a second
+TOLERANCE = 0.5 / 86400
+
+# Per SUB_TABLE row: sign, nakshatra and (unsplit) sub number of the row,
+# and which kinds of boundary its start is
+_STARTS = SUB_TABLE['starts']
+_ROWS = len(_STARTS)
+_ROW_SIGN = (np.floor(_STARTS / 30 + 1e-9)).astype(np.int16)
+_ROW_NAKSHATRA = (np.floor(_STARTS / float(NAKSHATRA_ARC) + 1e-9)).astype(np.int16)
+_ROW_SUB = np.cumsum(np.r_[True, SUB_TABLE['sub_lord'][1:] != SUB_TABLE['sub_lord'][:-1]
+                          ] | np.r_[True, _ROW_NAKSHATRA[1:] != _ROW_NAKSHATRA[:-1]]
+                     ).astype(np.int16) - 1
+_IS_BOUNDARY = {
+    'sign': np.r_[True, _ROW_SIGN[1:] != _ROW_SIGN[:-1]],
+    'nakshatra': np.r_[True, _ROW_NAKSHATRA[1:] != _ROW_NAKSHATRA[:-1]],
+    'sub': np.r_[True, _ROW_SUB[1:] != _ROW_SUB[:-1]],
+}
+_ROW_VALUE = {'sign': _ROW_SIGN, 'nakshatra': _ROW_NAKSHATRA, 'sub': _ROW_SUB}
+# Boundaries repeated over three turns so unwrapped longitudes can be searched
+_EXTENDED_STARTS = np.concatenate([_STARTS - 360, _STARTS, _STARTS + 360])
+
+
+def _wrap180(degrees):
+    return np.mod(degrees + 180, 360) - 180
+
+
+class TransitEventIndex:
+    """Sorted, persistable array of transit events"""
+
+    def __init__(self, events=None, start_jd=None, end_jd=None, bodies=None):
+        events = np.zeros(0, dtype=EVENT_DTYPE) if events is None else events
+        self.events = np.sort(events, order=('jd', 'body', 'kind'))
+        self.start_jd = start_jd
+        self.end_jd = end_jd
+        self.bodies = list(bodies or [])
+
+    def covers(self, start_jd, end_jd):
+        return (self.start_jd is not None and self.start_jd <= start_jd
+                and end_jd <= self.end_jd)
+
+    def between(self, start_jd, end_jd, bodies=None, kinds=None):
+        """Events with start_jd <= jd < end_jd, optionally filtered"""
+        jds = self.events['jd']
+        first, last = np.searchsorted(jds, [start_jd, end_jd], side='left')
+        selected = self.events[first:last]
+        if bodies:
+            codes = [self.bodies.index(body) for body in bodies if body in self.bodies]
+            selected = selected[np.isin(selected['body'], codes)]
+        if kinds:
+            codes = [KINDS.index(kind) for kind in kinds if kind in KINDS]
+            selected = selected[np.isin(selected['kind'], codes)]
+        return selected
+
+    def to_dicts(self, events):
+        """JSON-friendly rows for a slice returned by between()"""
+        rows = []
+        for jd, body, kind, from_value, to_value in events.tolist():
+            kind = KINDS[kind]
+            rows.append({
+                'time': datetime_from_julian_day(jd).isoformat(timespec='seconds') + 'Z',
+                'julian_day': round(jd, 6),
+                'body': self.bodies[body],
+                'event': kind,
+                'from': _label(kind, from_value),
+                'to': _label(kind, to_value),
+            })
+        return rows
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = path + '.tmp.npz'
+        np.savez(tmp_path, events=self.events,
+                 coverage=np.array([self.start_jd, self.end_jd], dtype=np.float64),
+                 bodies=np.array(self.bodies))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            start_jd, end_jd = data['coverage'].tolist()
+            return cls(data['events'], start_jd, end_jd, data['bodies'].tolist())
+
+
+def _label(kind, value):
+    if kind == 'sign':
+        return SIGNS[value]
+    if kind == 'nakshatra':
+        return NAKSHATRAS[value]
+    if kind == 'sub':
+        nakshatra, index = divmod(int(value), 9)
+        return VIMSHOTTARI[(nakshatra + index) % 9][0]
+    return None
+
+
+class TransitEventEngine:
+    def __init__(self, calculator=None):
+        self.calculator = calculator or KPChartCalculator()
+
+    def find_events(self, start_jd, end_jd, bodies=None):
+        """Build a TransitEventIndex for [start_jd, end_jd)"""
+        bodies = list(bodies or self.calculator.body_names)
+        grid = np.arange(np.floor(start_jd), np.ceil(end_jd) + 1.0)
+        samples = self.calculator.calculate_planet_positions_batch(grid, bodies)
+
+        chunks = []
+        for column, body in enumerate(bodies):
+            events = self._body_events(
+                body, grid, samples['longitude'][:, column],
+                samples['speed_longitude'][:, column]
+            )
+            events['body'] = column
+            chunks.append(events)
+
+        events = np.concatenate(chunks) if chunks else np.zeros(0, dtype=EVENT_DTYPE)
+        events = events[(events['jd'] >= start_jd) & (events['jd'] < end_jd)]
+        return TransitEventIndex(events, start_jd, end_jd, bodies)
+
+    def _positions(self, body, jds):
+        result = self.calculator.calculate_planet_positions_batch(jds, [body])
+        return result['longitude'][:, 0], result['speed_longitude'][:, 0]
+
+    def _body_events(self, body, grid, longitude, speed):
+        stations, station_kinds = self._find_stations(body, grid, speed)
+
+        # Insert stations into the sample grid so every interval is monotonic
+        if len(stations):
+            station_longitude, station_speed = self._positions(body, stations)
+            order = np.argsort(np.concatenate([grid, stations]), kind='stable')
+            times = np.concatenate([grid, stations])[order]
+            longitude = np.concatenate([longitude, station_longitude])[order]
+        else:
+            times = grid
+
+        crossings = self._find_crossings(body, times, longitude)
+        station_events = np.zeros(len(stations), dtype=EVENT_DTYPE)
+        station_events['jd'] = stations
+        station_events['kind'] = station_kinds
+        station_events['from'] = -1
+        station_events['to'] = -1
+        return np.concatenate([crossings, station_events])
+
+    def _find_stations(self, body, grid, speed):
+        """Bisect sign changes of the daily speed down to TOLERANCE"""
+        turning = np.nonzero(np.sign(speed[:-1]) != np.sign(speed[1:]))[0]
+        if not len(turning):
+            return np.zeros(0), np.zeros(0, dtype=np.int8)
+
+        low = grid[turning].copy()
+        high = grid[turning + 1].copy()
+        low_sign = np.sign(speed[turning])
+        while np.any(high - low > TOLERANCE):
+            middle = (low + high) / 2
+            middle_speed = self._positions(body, middle)[1]
+            same = np.sign(middle_speed) == low_sign
+            low = np.where(same, middle, low)
+            high = np.where(same, high, middle)
+
+        kinds = np.where(low_sign > 0, KINDS.index('retrograde'), KINDS.index('direct'))
+        return (low + high) / 2, kinds.astype(np.int8)
+
+    def _find_crossings(self, body, times, longitude):
+        """Locate every boundary crossing between consecutive samples"""
+        start = longitude[:-1]
+        delta = _wrap180(longitude[1:] - start)
+        end = start + delta
+        low = np.minimum(start, end)
+        high = np.maximum(start, end)
+
+        # Boundaries x crossed in each interval: low < x <= high
+        first = np.searchsorted(_EXTENDED_STARTS, low, side='right')
+        last = np.searchsorted(_EXTENDED_STARTS, high, side='right')
+        counts = last - first
+        interval = np.repeat(np.arange(len(counts)), counts)
+        if not len(interval):
+            return np.zeros(0, dtype=EVENT_DTYPE)
+        offsets = np.arange(len(interval)) - np.repeat(np.cumsum(counts) - counts, counts)
+        boundary = _EXTENDED_STARTS[first[interval] + offsets]
+        row = (first[interval] + offsets) % _ROWS
+        forward = delta[interval] > 0
+
+        jds = self._refine(body, boundary, forward, times[interval], times[interval + 1],
+                           start[interval], delta[interval])
+
+        entered = np.where(forward, row, (row - 1) % _ROWS)
+        left = np.where(forward, (row - 1) % _ROWS, row)
+
+        chunks = []
+        for kind in ('sign', 'nakshatra', 'sub'):
+            mask = _IS_BOUNDARY[kind][row]
+            events = np.zeros(int(mask.sum()), dtype=EVENT_DTYPE)
+            events['jd'] = jds[mask]
+            events['kind'] = KINDS.index(kind)
+            events['from'] = _ROW_VALUE[kind][left[mask]]
+            events['to'] = _ROW_VALUE[kind][entered[mask]]
+            chunks.append(events)
+        return np.concatenate(chunks)
+
+    def _refine(self, body, boundary, forward, low, high, start, delta):
+        """Bracketed Newton iteration for lon(t) == boundary"""
+        direction = np.where(forward, 1.0, -1.0)
+        # Linear first guess inside each interval
+        t = low + (high - low) * np.clip((boundary - start) / delta, 0, 1)
+        active = np.ones(len(t), dtype=bool)
+
+        for _ in range(60):
+            if not active.any():
+                break
+            index = np.nonzero(active)[0]
+            longitude, speed = self._positions(body, t[index])
+            residual = _wrap180(longitude - boundary[index])
+
+            # Before the crossing the signed residual is negative
+            before = residual * direction[index] < 0
+            low[index] = np.where(before, t[index], low[index])
+            high[index] = np.where(before, high[index], t[index])
+
+            with np.errstate(divide='ignore', invalid='ignore'):
+                step = residual / speed
+            candidate = t[index] - step
+            bisect = ~((candidate > low[index]) & (candidate < high[index]))
+            candidate = np.where(bisect, (low[index] + high[index]) / 2, candidate)
+
+            done = (np.abs(candidate - t[index]) < TOLERANCE) | (high[index] - low[index] < TOLERANCE)
+            t[index] = candidate
+            active[index[done]] = False
+
+        return t
+
+
+def load_default_index(path=DEFAULT_INDEX_PATH):
+    """Load the persisted event index if it has been built, else return None"""
+    if not os.path.exists(path):
+        return None
+    try:
+        return TransitEventIndex.load(path)
+    except Exception as e:
+        print(f"Error loading transit event index {path}: {e}")
+        return None
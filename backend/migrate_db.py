@@ -1,9 +1,96 @@
-import os
-from app import app, db
+"""
+Schema creation and upgrades.
+
+ensure_schema() creates missing tables and adds columns introduced after a
+table was created; the app runs it at startup. upgrade_indexes() removes
+duplicate price rows and creates indexes missing from existing tables; it
+changes data, so it only runs from this script (build/release step). Both
+hold a schema lock (a PostgreSQL advisory lock, or a file lock next to a
+SQLite database) and re-inspect the schema under it, so concurrent workers
+and repeated runs are safe.
+"""
+from contextlib import contextmanager
+import fcntl
+
+from flask import Flask
+from sqlalchemy import inspect
+
+from database import init_db
+from models.stock_models import db, StockPrice
+
+# Arbitrary key of the PostgreSQL advisory lock held during schema changes
+SCHEMA_LOCK_KEY = 7234601
+# Indexes replaced by another name, dropped when their successor is created
+REPLACED_INDEXES = {'uq_stock_price_stock_date': 'idx_stock_price_stock_date'}
+
+
+@contextmanager
+def schema_lock(connection):
+    """Serialize schema changes across processes"""
+    dialect = connection.dialect.name
+    database = connection.engine.url.database
+    if dialect == 'postgresql':
+        connection.exec_driver_sql(f'SELECT pg_advisory_lock({SCHEMA_LOCK_KEY})')
+        try:
+            yield
+        finally:
+            connection.exec_driver_sql(f'SELECT pg_advisory_unlock({SCHEMA_LOCK_KEY})')
+    elif dialect == 'sqlite' and database and database != ':memory:':
+        with open(f'{database}.schema-lock', 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+    else:
+        yield
+
+
+def ensure_schema():
+    """Create missing tables and add missing columns (idempotent)"""
+    with db.engine.connect() as connection, schema_lock(connection), connection.begin():
+        db.metadata.create_all(connection)
+        inspector = inspect(connection)
+        for table in db.metadata.sorted_tables:
+            existing = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing:
+                    column_type = column.type.compile(dialect=connection.dialect)
+                    connection.exec_driver_sql(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}')
+                    print(f"➕ Added column {table.name}.{column.name}")
+
+
+def upgrade_indexes():
+    """Create indexes missing from existing tables, deduplicating prices first (idempotent)"""
+    with db.engine.connect() as connection, schema_lock(connection), connection.begin():
+        inspector = inspect(connection)
+        for table in db.metadata.sorted_tables:
+            existing = {index['name'] for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name in existing:
+                    continue
+                if index.unique and table is StockPrice.__table__:
+                    # Keep the first row stored for each (stock_id, date)
+                    deleted = connection.exec_driver_sql(
+                        'DELETE FROM stock_price WHERE id NOT IN '
+                        '(SELECT MIN(id) FROM stock_price GROUP BY stock_id, date)'
+                    ).rowcount
+                    if deleted:
+                        print(f"🧹 Removed {deleted} duplicate price rows")
+                index.create(connection)
+                print(f"➕ Added index {index.name}")
+                replaced = REPLACED_INDEXES.get(index.name)
+                if replaced in existing:
+                    connection.exec_driver_sql(f'DROP INDEX {replaced}')
+                    print(f"➖ Dropped index {replaced}")
+
 
 def migrate_database():
+    app = Flask(__name__)
+    init_db(app)
     with app.app_context():
-        db.create_all()
+        ensure_schema()
+        upgrade_indexes()
         print("✅ Database tables created successfully!")
 
 if __name__ == '__main__':
@@ -1,63 +1,104 @@
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
-import json
 
 db = SQLAlchemy()
 
+# Stock Model
 class Stock(db.Model):
-    __tablename__ = 'stocks'
-    
     id = db.Column(db.Integer, primary_key=True)
     symbol = db.Column(db.String(20), unique=True, nullable=False)
-    name = db.Column(db.String(200))
-    listing_date = db.Column(db.Date, nullable=False)
-    listing_time = db.Column(db.Time, nullable=False, default='10:00:00')
-    exchange = db.Column(db.String(50), default='NSE')
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    
-    # Relationships
-    birth_chart = db.relationship('BirthChart', backref='stock', uselist=False, cascade="all, delete-orphan")
-    house_significators = db.relationship('HouseSignificator', backref='stock', cascade="all, delete-orphan")
-    price_data = db.relationship('StockPrice', backref='stock', cascade="all, delete-orphan")
-
-class BirthChart(db.Model):
-    __tablename__ = 'birth_charts'
-    
-    id = db.Column(db.Integer, primary_key=True)
-    stock_id = db.Column(db.Integer, db.ForeignKey('stocks.id'), nullable=False)
-    ascendant_degree = db.Column(db.Float)
-    cusps = db.Column(db.JSON)
-    planet_positions = db.Column(db.JSON)
-    house_positions = db.Column(db.JSON)
+    name = db.Column(db.String(100))
+    listing_date = db.Column(db.String(50), nullable=False)
+    listing_time = db.Column(db.String(50), default='10:00')
+    price_version = db.Column(db.Integer, default=0)  # bumped when prices are replaced
+    chart_version = db.Column(db.Integer, default=0)  # bumped when the KP chart is rebuilt
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
-class HouseSignificator(db.Model):
-    __tablename__ = 'house_significators'
-    
-    id = db.Column(db.Integer, primary_key=True)
-    stock_id = db.Column(db.Integer, db.ForeignKey('stocks.id'), nullable=False)
-    house_number = db.Column(db.Integer, nullable=False)
-    cuspal_sign_lord = db.Column(db.String(20))
-    cuspal_star_lord = db.Column(db.String(20))
-    cuspal_sub_lord = db.Column(db.String(20))
-    occupying_planets = db.Column(db.JSON)
-    all_significators = db.Column(db.JSON)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'symbol': self.symbol,
+            'name': self.name,
+            'listing_date': self.listing_date,
+            'listing_time': self.listing_time,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
 
+# Stock Price Model
 class StockPrice(db.Model):
-    __tablename__ = 'stock_prices'
-    
     id = db.Column(db.Integer, primary_key=True)
-    stock_id = db.Column(db.Integer, db.ForeignKey('stocks.id'), nullable=False)
-    time = db.Column(db.DateTime, nullable=False)
-    open = db.Column(db.Float)
-    high = db.Column(db.Float)
-    low = db.Column(db.Float)
-    close = db.Column(db.Float)
+    stock_id = db.Column(db.Integer, db.ForeignKey('stock.id'), nullable=False)
+    date = db.Column(db.Date, nullable=False)
+    open_price = db.Column(db.Float)
+    high_price = db.Column(db.Float)
+    low_price = db.Column(db.Float)
+    close_price = db.Column(db.Float)
     volume = db.Column(db.BigInteger)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
     __table_args__ = (
-        db.Index('idx_stock_prices_time', 'time'),
-        db.Index('idx_stock_prices_stock_id', 'stock_id'),
+        db.Index('uq_stock_price_stock_date', 'stock_id', 'date', unique=True),
     )
+
+    def to_dict(self):
+        return {
+            'date': self.date.isoformat(),
+            'open': self.open_price,
+            'high': self.high_price,
+            'low': self.low_price,
+            'close': self.close_price,
+            'volume': self.volume
+        }
+
+# KP Birth Chart Model
+class KPBirthChart(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    stock_id = db.Column(db.Integer, db.ForeignKey('stock.id'), nullable=False)
+    ascendant_degree = db.Column(db.Float)
+    planet_positions = db.Column(db.JSON)  # Store as JSON
+    house_significators = db.Column(db.JSON)  # Store as JSON
+    significator_masks = db.Column(db.LargeBinary)  # 12 uint16 planet bitmasks, one per house
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+# Running correlation counts, folded forward as new bars arrive
+class CorrelationSummary(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    stock_id = db.Column(db.Integer, db.ForeignKey('stock.id'), unique=True, nullable=False)
+    fingerprint = db.Column(db.String(40))  # natal mask + scoring weights
+    last_date = db.Column(db.Date)
+    last_close = db.Column(db.Float)
+    price_count = db.Column(db.Integer, default=0)
+    correct_predictions = db.Column(db.Integer, default=0)
+    total_days = db.Column(db.Integer, default=0)
+    up_days = db.Column(db.Integer, default=0)
+    up_calls = db.Column(db.Integer, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+# Background job (see job_queue.py)
+class Job(db.Model):
+    id = db.Column(db.String(32), primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, running, succeeded, failed
+    params = db.Column(db.JSON)
+    progress = db.Column(db.Float, default=0.0)
+    message = db.Column(db.String(200))
+    result = db.Column(db.JSON)
+    error = db.Column(db.Text)
+    owner = db.Column(db.String(100))  # host:pid:boot id running the job
+    heartbeat_at = db.Column(db.DateTime)  # refreshed while the owner is alive
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'progress': self.progress,
+            'message': self.message,
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
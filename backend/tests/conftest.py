@@ -0,0 +1,55 @@
+from datetime import datetime
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope='session')
+def app_module(tmp_path_factory):
+    """The Flask app module on a throwaway SQLite database and price store"""
+    root = tmp_path_factory.mktemp('app')
+    os.environ['DATABASE_URL'] = f"sqlite:///{root / 'stocks.db'}"
+    os.environ['PRICE_STORE_DIR'] = str(root / 'price_store')
+    import app
+    return app
+
+
+@pytest.fixture
+def client(app_module):
+    with app_module.app.app_context():
+        yield app_module.app.test_client()
+
+
+@pytest.fixture
+def add_stock(client):
+    """Create a stock (and its chart) through the API; returns its id"""
+    def add(symbol, listing_date='2005-11-11'):
+        response = client.post('/api/stocks', json={'symbol': symbol, 'listing_date': listing_date})
+        assert response.status_code == 200, response.get_json()
+        return response.get_json()['id']
+    return add
+
+
+@pytest.fixture
+def store_prices():
+    """Store daily prices for a stock the way a history import does; returns the result"""
+    from data.stock_data import StockDataManager
+
+    def store(stock_id, start, days, seed=0):
+        closes = 100 + np.random.default_rng(seed).normal(0, 2, days).cumsum()
+        first = np.datetime64(start, 'D')
+        return StockDataManager().store_price_columns(stock_id, {
+            'stock_id': [stock_id] * days,
+            'date': [(first + day).astype(object) for day in range(days)],
+            'open_price': closes.tolist(),
+            'high_price': (closes + 1).tolist(),
+            'low_price': (closes - 1).tolist(),
+            'close_price': closes.tolist(),
+            'volume': [1000] * days,
+            'created_at': [datetime.utcnow()] * days
+        })
+    return store
@@ -0,0 +1,20 @@
+import pytest
+
+
+@pytest.mark.parametrize('random_sets', [10 ** 9, -1, 2.5, '50', True])
+def test_invalid_random_sets_are_rejected(client, random_sets):
+    response = client.post('/api/backtest', json={'random_sets': random_sets})
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
+
+
+def test_weight_sets_must_be_a_list(client):
+    assert client.post('/api/backtest', json={'weight_sets': {'Sun': 1}}).status_code == 400
+
+
+def test_sweep_includes_the_baseline(client, add_stock, store_prices):
+    stock_id = add_stock('SWEEP')
+    store_prices(stock_id, '2021-01-01', 60)
+    response = client.post('/api/backtest', json={'stock_ids': [stock_id], 'random_sets': 5, 'seed': 1})
+    assert response.status_code == 200, response.get_json()
+    assert response.get_json()['evaluated'] == 6
@@ -0,0 +1,96 @@
+from datetime import date, timedelta
+
+import numpy as np
+
+from analysis import correlation
+
+
+def loop_analysis(dates, closes, scores):
+    """The per-row loop the vectorized engine replaced, with one score per day.
+
+    Days where either close is missing are skipped (the loop crashed on them)
+    and a missing score is reported as None.
+    """
+    rows, correct = [], 0
+    for i in range(1, len(closes)):
+        today, yesterday = closes[i], closes[i - 1]
+        if today is None or yesterday is None:
+            continue
+        if yesterday and yesterday > 0:
+            price_change = (today - yesterday) / yesterday * 100
+        else:
+            price_change = 0
+        astro_score = scores[i - 1]
+        predicted_direction = 1 if astro_score > 0 else -1
+        actual_direction = 1 if price_change > 0 else -1
+        if predicted_direction == actual_direction:
+            correct += 1
+        rows.append({
+            'date': dates[i].isoformat(),
+            'price_change': round(price_change, 2),
+            'astro_score': None if astro_score != astro_score else round(astro_score, 2),
+            'predicted_direction': 'UP' if predicted_direction == 1 else 'DOWN',
+            'actual_direction': 'UP' if actual_direction == 1 else 'DOWN',
+            'prediction_correct': predicted_direction == actual_direction
+        })
+    return correct, len(rows), rows
+
+
+def vectorized_analysis(dates, closes, scores):
+    closes = np.array([np.nan if close is None else close for close in closes])
+    return_dates = np.array(dates[1:], dtype='datetime64[D]')
+    returns = correlation.daily_returns(closes)
+    predicted, actual, hits, valid = correlation.direction_hits(returns, scores)
+    rows = correlation.window_slice(return_dates, window=len(return_dates))
+    result = correlation.daily_rows(return_dates, returns, scores, predicted, actual, hits, rows)
+    return int(hits.sum()), int(valid.sum()), [row for row in result if row['price_change'] is not None]
+
+
+def series(days, seed):
+    rng = np.random.default_rng(seed)
+    # Trading days with gaps, so dates are not consecutive
+    offsets = np.cumsum(rng.integers(1, 4, days))
+    dates = [date(2021, 1, 1) + timedelta(days=int(offset)) for offset in offsets]
+    closes = (100 + rng.normal(0, 2, days).cumsum()).round(2).tolist()
+    scores = rng.choice([-1.2, -0.5, 0.0, 0.35, 1.5], days - 1)
+    return dates, closes, scores
+
+
+def test_matches_loop():
+    for seed in range(5):
+        dates, closes, scores = series(200, seed)
+        assert vectorized_analysis(dates, closes, scores) == loop_analysis(dates, closes, scores)
+
+
+def test_zero_previous_close_counts_as_no_change():
+    dates, closes, scores = series(30, 7)
+    closes[5] = 0.0
+    closes[12] = -1.0
+    scores[5] = scores[12] = -0.5
+    expected = loop_analysis(dates, closes, scores)
+    assert vectorized_analysis(dates, closes, scores) == expected
+    assert expected[2][5]['price_change'] == 0 and expected[2][5]['actual_direction'] == 'DOWN'
+
+
+def test_missing_closes_are_excluded():
+    dates, closes, scores = series(40, 3)
+    closes[0] = closes[10] = closes[11] = closes[-1] = None
+    correct, days, rows = vectorized_analysis(dates, closes, scores)
+    assert (correct, days, rows) == loop_analysis(dates, closes, scores)
+    assert days == 39 - 5
+
+
+def test_missing_transit_scores_predict_down():
+    dates, closes, scores = series(60, 5)
+    scores[::7] = np.nan
+    expected = loop_analysis(dates, closes, scores)
+    assert vectorized_analysis(dates, closes, scores) == expected
+    assert expected[2][0]['astro_score'] is None and expected[2][0]['predicted_direction'] == 'DOWN'
+
+
+def test_window_slice_by_dates():
+    dates = np.array(['2021-01-04', '2021-01-05', '2021-01-07', '2021-01-08'], dtype='datetime64[D]')
+    assert correlation.window_slice(dates, window=2) == slice(2, 4)
+    assert correlation.window_slice(dates, start=date(2021, 1, 6)) == slice(2, 4)
+    assert correlation.window_slice(dates, start=date(2021, 1, 5), end=date(2021, 1, 7)) == slice(1, 3)
+    assert correlation.window_slice(dates, end=date(2021, 1, 1)) == slice(0, 0)
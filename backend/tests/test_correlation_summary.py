@@ -0,0 +1,37 @@
+import numpy as np
+
+
+def test_summary_folds_new_bars_like_a_full_recount(app_module, add_stock, store_prices):
+    stock_id = add_stock('FOLD')
+    db, Stock = app_module.db, app_module.Stock
+    chart = app_module.KPBirthChart.query.filter_by(stock_id=stock_id).first()
+    masks = app_module.chart_significator_masks(chart)
+    wealth_mask = int(masks[1] | masks[10])
+
+    def full_count():
+        prices = app_module.load_price_columns(db.session.get(Stock, stock_id))
+        return app_module.kp_engine.correlation_counts((prices['date'], prices['close']), wealth_mask)
+
+    def summary_counts(summary):
+        return (summary.correct_predictions, summary.total_days, summary.up_days, summary.up_calls)
+
+    store_prices(stock_id, '2022-01-01', 40, seed=3)
+    summary = app_module.update_correlation_summary(db.session.get(Stock, stock_id), masks)
+    assert summary_counts(summary) == full_count()
+
+    # Appended bars are folded into the same summary row
+    summary_id = summary.id
+    for first, last in ((40, 41), (41, 90), (90, 120)):
+        store_prices(stock_id, str(np.datetime64('2022-01-01') + first), last - first, seed=last)
+        summary = app_module.update_correlation_summary(db.session.get(Stock, stock_id), masks)
+        assert summary.id == summary_id
+        assert summary.price_count == last
+        assert summary_counts(summary) == full_count()
+
+    # A backfilled bar inside the summarized range forces a rebuild
+    store_prices(stock_id, '2021-12-01', 1, seed=4)
+    assert app_module.CorrelationSummary.query.filter_by(stock_id=stock_id).count() == 0
+    db.session.expunge_all()
+    summary = app_module.update_correlation_summary(db.session.get(Stock, stock_id), masks)
+    assert summary.price_count == 121
+    assert summary_counts(summary) == full_count()
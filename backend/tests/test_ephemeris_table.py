@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from kp_astrology.chart_calculator import KPChartCalculator
+from kp_astrology.ephemeris_table import EphemerisTable, build_ephemeris_table
+
+
+@pytest.fixture(scope='module')
+def table(tmp_path_factory):
+    path = tmp_path_factory.mktemp('ephemeris') / 'kp_2020.bin'
+    table = EphemerisTable(build_ephemeris_table(str(path), KPChartCalculator(),
+                                                 start_year=2020, end_year=2020))
+    yield table
+    table.close()
+
+
+def test_interpolation_matches_swisseph(table):
+    jds = np.random.default_rng(1).uniform(table.start_jd, table.end_jd - 1, 500)
+    interpolated = KPChartCalculator(ephemeris_table=table).calculate_planet_positions_batch(jds)
+    exact = KPChartCalculator().calculate_planet_positions_batch(jds)
+
+    error = np.abs((interpolated['longitude'] - exact['longitude'] + 180) % 360 - 180) * 3600
+    # Arc-seconds; the shortest KP sub-sub division is about 2 arc-minutes
+    moon = exact['bodies'].index('Moon')
+    assert error[:, moon].max() < 2.0
+    assert np.delete(error, moon, axis=1).max() < 15.0
+    assert np.allclose(interpolated['speed_longitude'], exact['speed_longitude'], atol=1e-2)
+
+
+def test_interpolation_is_exact_at_table_days(table):
+    jds = table.start_jd + np.arange(0, 360, 37.0)
+    interpolated = table.interpolate(jds)
+    assert np.array_equal(interpolated[:, :, 0], table.data[np.arange(0, 360, 37), :, 0] % 360)
+
+
+def test_table_bounds(table):
+    assert table.covers([table.start_jd, table.end_jd - 1e-6])
+    assert not table.covers([table.end_jd])
+    with pytest.raises(ValueError):
+        table.interpolate([table.start_jd - 1])
+
+    # Outside the table the calculator falls back to Swiss Ephemeris
+    calculator = KPChartCalculator(ephemeris_table=table)
+    jds = [table.end_jd + 10.25]
+    assert np.allclose(calculator.calculate_planet_positions_batch(jds)['longitude'],
+                       KPChartCalculator().calculate_planet_positions_batch(jds)['longitude'])
@@ -0,0 +1,33 @@
+import pytest
+
+
+@pytest.mark.parametrize('limit', [1, 7, 10, 25])
+def test_keyset_pages_cover_every_price_once(app_module, client, add_stock, store_prices, limit):
+    stock_id = add_stock(f'PAGES{limit}')
+    store_prices(stock_id, '2021-03-01', 25)
+    StockPrice = app_module.StockPrice
+    newest_first = [price.date.isoformat() for price in
+                    StockPrice.query.filter_by(stock_id=stock_id).order_by(StockPrice.date.desc())]
+
+    pages, cursor = [], {}
+    while True:
+        page = client.get(f'/api/stocks/{stock_id}/prices', query_string={'limit': limit, **cursor}).get_json()
+        pages.append([price['date'] for price in page['prices']])
+        if page['next_before'] is None:
+            break
+        cursor = {'before': page['next_before']}
+    assert sum(pages, []) == newest_first
+    assert all(len(page) == limit for page in pages[:-1])
+
+    # Walking back with ?after= returns the same pages in reverse
+    back = []
+    while page['next_after'] is not None:
+        page = client.get(f'/api/stocks/{stock_id}/prices',
+                          query_string={'limit': limit, 'after': page['next_after']}).get_json()
+        back.append([price['date'] for price in page['prices']])
+    assert sum(reversed(back), []) + pages[-1] == newest_first
+
+
+def test_bad_cursor_is_rejected(client, add_stock):
+    stock_id = add_stock('BADCURSOR')
+    assert client.get(f'/api/stocks/{stock_id}/prices?before=yesterday').status_code == 400
@@ -0,0 +1,26 @@
+import numpy as np
+
+from data.price_store import COLUMNS, PriceStore
+
+
+def columns(days):
+    values = {name: np.arange(days) for name in COLUMNS}
+    values['date'] = np.datetime64('2021-01-01') + np.arange(days)
+    return values
+
+
+def test_write_removes_only_older_versions(tmp_path):
+    store = PriceStore(str(tmp_path))
+    store.write(7, '20210101000000000000-1', columns(3))
+    store.write(7, '20210101000000000000-3', columns(5))
+    store.write(8, '20210101000000000000-1', columns(2))
+    # A slow writer finishing an older version after a newer one was stored
+    store.write(7, '20210101000000000000-2', columns(4))
+
+    assert store.read(7, '20210101000000000000-1') is None
+    assert len(store.read(7, '20210101000000000000-3')['close']) == 5
+    assert store.read(8, '20210101000000000000-1') is not None
+
+    store.write(7, '20210101000000000000-10', columns(6))
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        '7-20210101000000000000-10', '8-20210101000000000000-1']
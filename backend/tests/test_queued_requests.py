@@ -0,0 +1,49 @@
+import time
+
+import pytest
+
+
+def job_result(client, queued):
+    """Poll a queued request's result_url until the job finishes"""
+    assert queued.status_code == 202, queued.get_json()
+    job = queued.get_json()
+    assert job['status_url'] == f"/api/jobs/{job['id']}"
+    for _ in range(300):
+        response = client.get(job['result_url'])
+        if response.status_code != 202:
+            return response
+        time.sleep(0.1)
+    pytest.fail('job did not finish')
+
+
+def test_large_backtest_is_queued(client, add_stock, store_prices, monkeypatch):
+    stock_id = add_stock('QBT')
+    store_prices(stock_id, '2021-01-01', 60)
+    body = {'stock_ids': [stock_id], 'random_sets': 5, 'seed': 1}
+    inline = client.post('/api/backtest', json=body)
+    assert inline.status_code == 200
+
+    monkeypatch.setattr('app.MAX_INLINE_BACKTEST_CELLS', 6 * 60 - 1)
+    response = job_result(client, client.post('/api/backtest', json=body))
+    assert response.status_code == 200
+    assert response.get_json()['evaluated'] == inline.get_json()['evaluated']
+
+
+def test_large_significance_test_is_queued(client, add_stock, store_prices, monkeypatch):
+    stock_id = add_stock('QSIG')
+    store_prices(stock_id, '2021-01-01', 60)
+    monkeypatch.setattr('app.MAX_INLINE_SIGNIFICANCE_DRAWS', 0)
+    response = job_result(client, client.post('/api/significance', json={'stock_ids': [stock_id]}))
+    assert response.status_code == 200
+
+
+def test_correlation_is_queued_until_summarized(client, add_stock, store_prices, monkeypatch):
+    stock_id = add_stock('QCOR')
+    store_prices(stock_id, '2021-01-01', 60)
+    monkeypatch.setattr('app.MAX_INLINE_PRICE_BARS', 10)
+    response = job_result(client, client.post(f'/api/stocks/{stock_id}/correlation'))
+    assert response.status_code == 200
+    assert 'accuracy' in response.get_json()
+
+    # Everything is folded into the summary now, so the next request runs inline
+    assert client.post(f'/api/stocks/{stock_id}/correlation').status_code == 200
@@ -0,0 +1,26 @@
+from datetime import datetime, timedelta
+
+from kp_astrology.chart_calculator import KPChartCalculator, julian_days_from_datetimes
+from kp_astrology.ruling_planets import RulingPlanetsService
+from kp_astrology.sub_lords import kp_lords
+
+
+def test_moon_is_current_every_minute():
+    service = RulingPlanetsService()
+    calculator = KPChartCalculator()
+    start = datetime(2024, 3, 4, 0, 30)
+    for minutes in range(0, 300, 17):
+        now = start + timedelta(minutes=minutes)
+        moon = service.get(now)['moon']
+        exact = calculator.calculate_planet_positions_batch(julian_days_from_datetimes([now]), ['Moon'])
+        assert abs(moon['degree'] - float(exact['longitude'][0, 0])) < 1e-3
+        assert (moon['sign_lord'], moon['star_lord'], moon['sub_lord']) == kp_lords(moon['degree'])[:3]
+
+
+def test_day_lord_changes_at_sunrise():
+    # Mumbai: sunrise on Monday 2024-06-03 is about 00:34 UT (06:04 IST)
+    service = RulingPlanetsService()
+    assert service.get(datetime(2024, 6, 2, 23, 59))['day_lord'] == 'Sun'
+    assert service.get(datetime(2024, 6, 3, 0, 30))['day_lord'] == 'Sun'
+    assert service.get(datetime(2024, 6, 3, 0, 40))['day_lord'] == 'Moon'
+    assert service.get(datetime(2024, 6, 3, 18, 40))['day_lord'] == 'Moon'
@@ -0,0 +1,51 @@
+from datetime import date, datetime, timedelta
+
+from data.stock_data import INSERT_CHUNK_SIZE, insert_prices
+
+
+def stored_dates(app_module, stock_id):
+    StockPrice = app_module.StockPrice
+    return [price.date for price in StockPrice.query.filter_by(stock_id=stock_id).order_by(StockPrice.date)]
+
+
+def price_version(app_module, stock_id):
+    app_module.db.session.expire_all()
+    return app_module.db.session.get(app_module.Stock, stock_id).price_version
+
+
+def test_bulk_insert_skips_stored_dates(app_module, add_stock, store_prices):
+    stock_id = add_stock('CONFLICT')
+    assert store_prices(stock_id, '2020-01-01', 10)
+    version = price_version(app_module, stock_id)
+
+    # Overlapping rows: only the five new dates are inserted, once
+    rows = [{'stock_id': stock_id, 'date': date(2020, 1, 6) + timedelta(days=day), 'close_price': 1.0,
+             'created_at': datetime.utcnow()} for day in range(10)]
+    inserted = insert_prices(rows)
+    app_module.db.session.commit()
+    assert inserted == [date(2020, 1, 11) + timedelta(days=day) for day in range(5)]
+    assert stored_dates(app_module, stock_id) == [date(2020, 1, 1) + timedelta(days=day) for day in range(15)]
+    assert insert_prices(rows) == []
+
+    # Storing dates that are all stored changes nothing, not even the version
+    assert store_prices(stock_id, '2020-01-01', 15)
+    assert len(stored_dates(app_module, stock_id)) == 15
+    assert price_version(app_module, stock_id) == version
+
+    # New dates bump the version once, across several INSERT chunks
+    assert store_prices(stock_id, '2020-01-01', INSERT_CHUNK_SIZE + 10)
+    assert len(stored_dates(app_module, stock_id)) == INSERT_CHUNK_SIZE + 10
+    assert price_version(app_module, stock_id) == version + 1
+
+
+def test_new_bars_keep_the_summary_and_backfills_drop_it(app_module, client, add_stock, store_prices):
+    stock_id = add_stock('SUMMARY')
+    store_prices(stock_id, '2020-01-01', 30)
+    assert client.post(f'/api/stocks/{stock_id}/correlation').status_code == 200
+    summaries = app_module.CorrelationSummary.query.filter_by(stock_id=stock_id)
+    assert summaries.count() == 1
+
+    store_prices(stock_id, '2020-01-31', 5)
+    assert summaries.count() == 1
+    store_prices(stock_id, '2019-12-31', 1)
+    assert summaries.count() == 0
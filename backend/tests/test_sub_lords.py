@@ -0,0 +1,53 @@
+import numpy as np
+
+from kp_astrology.sub_lords import (
+    PLANETS, SIGN_LORDS, SUB_SUB_TABLE, SUB_TABLE, VIMSHOTTARI, kp_lords, kp_lords_array
+)
+
+
+def reference_lords(longitude):
+    """Sign, star, sub and sub-sub lord by walking the Vimshottari divisions"""
+    longitude %= 360
+    nakshatra_arc = 40 / 3
+    nakshatra = int(longitude // nakshatra_arc)
+    lords = [SIGN_LORDS[int(longitude // 30)], VIMSHOTTARI[nakshatra % 9][0]]
+
+    start, arc, first = nakshatra * nakshatra_arc, nakshatra_arc, nakshatra % 9
+    for _ in range(2):
+        for offset in range(9):
+            index = (first + offset) % 9
+            part = arc * VIMSHOTTARI[index][1] / 120
+            if longitude < start + part or offset == 8:
+                break
+            start += part
+        lords.append(VIMSHOTTARI[index][0])
+        arc, first = part, index
+    return tuple(lords)
+
+
+def test_sub_table_has_the_standard_249_rows():
+    assert len(SUB_TABLE['starts']) == 249
+    assert np.all(np.diff(SUB_TABLE['starts']) > 0)
+    assert np.all(np.diff(SUB_SUB_TABLE['starts']) > 0)
+
+
+def test_lords_match_reference():
+    longitudes = np.random.default_rng(0).uniform(0, 360, 5000)
+    arrays = kp_lords_array(longitudes)
+    for index, longitude in enumerate(longitudes.tolist()):
+        expected = reference_lords(longitude)
+        assert kp_lords(longitude) == expected
+        assert tuple(PLANETS[arrays[column][index]]
+                     for column in ('sign_lord', 'star_lord', 'sub_lord', 'sub_sub_lord')) == expected
+
+
+def test_lords_just_inside_every_sub_sub_division():
+    starts = SUB_SUB_TABLE['starts']
+    ends = np.r_[starts[1:], 360.0]
+    for longitude in ((starts + ends) / 2).tolist():
+        assert kp_lords(longitude) == reference_lords(longitude)
+
+
+def test_longitudes_wrap():
+    assert kp_lords(360.0) == kp_lords(0.0)
+    assert kp_lords(-0.5) == kp_lords(359.5)
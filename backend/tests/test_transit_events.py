@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from kp_astrology.chart_calculator import KPChartCalculator
+from kp_astrology.sub_lords import NAKSHATRA_ARC, kp_lords_array
+from kp_astrology.transit_events import KINDS, TransitEventEngine
+
+# 2020-01-01 00:00 UT
+START_JD = 2458849.5
+
+
+@pytest.fixture(scope='module')
+def calculator():
+    return KPChartCalculator()
+
+
+def sampled_changes(calculator, body, start_jd, end_jd, kind, step=1 / 1440):
+    """Brute force: indexes of one-minute samples after which a boundary was crossed"""
+    jds = np.arange(start_jd, end_jd, step)
+    longitude = calculator.calculate_planet_positions_batch(jds, [body])['longitude'][:, 0]
+    if kind == 'sign':
+        value = np.floor(longitude / 30)
+    elif kind == 'nakshatra':
+        value = np.floor(longitude / float(NAKSHATRA_ARC))
+    else:
+        value = np.floor(longitude / float(NAKSHATRA_ARC)) * 9 + kp_lords_array(longitude)['sub_lord']
+    return jds, np.nonzero(value[1:] != value[:-1])[0]
+
+
+@pytest.mark.parametrize('kind', ['sign', 'nakshatra', 'sub'])
+def test_moon_crossings_match_brute_force(calculator, kind):
+    end_jd = START_JD + 5
+    index = TransitEventEngine(calculator).find_events(START_JD, end_jd, ['Moon'])
+    events = index.between(START_JD, end_jd, kinds=[kind])
+
+    jds, changes = sampled_changes(calculator, 'Moon', START_JD, end_jd, kind)
+    assert len(events) == len(changes)
+    # Each refined time lies inside the minute in which the samples changed
+    assert np.all(events['jd'] >= jds[changes] - 1e-5)
+    assert np.all(events['jd'] <= jds[changes + 1] + 1e-5)
+
+
+def test_crossing_times_are_boundaries(calculator):
+    index = TransitEventEngine(calculator).find_events(START_JD, START_JD + 3, ['Moon'])
+    events = index.between(START_JD, START_JD + 3, kinds=['sub'])
+    seconds = 2 / 86400
+    before = kp_lords_array(calculator.calculate_planet_positions_batch(
+        events['jd'] - seconds, ['Moon'])['longitude'][:, 0])['sub_lord']
+    after = kp_lords_array(calculator.calculate_planet_positions_batch(
+        events['jd'] + seconds, ['Moon'])['longitude'][:, 0])['sub_lord']
+    assert np.all(before != after)
+
+
+def test_mercury_stations_bracket_retrograde_motion(calculator):
+    # Mercury was retrograde from mid February to early March 2020
+    start_jd, end_jd = START_JD + 30, START_JD + 80
+    events = TransitEventEngine(calculator).find_events(start_jd, end_jd, ['Mercury']).between(
+        start_jd, end_jd, kinds=['retrograde', 'direct'])
+    assert [KINDS[kind] for kind in events['kind'].tolist()] == ['retrograde', 'direct']
+
+    speeds = calculator.calculate_planet_positions_batch(
+        np.r_[events['jd'] - 1e-3, events['jd'] + 1e-3], ['Mercury'])['speed_longitude'][:, 0]
+    assert speeds[0] > 0 > speeds[2] and speeds[1] < 0 < speeds[3]